@@ -0,0 +1,24 @@
+import os
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.config.db import MONGO_URI, MONGO_MIN_POOL_SIZE, MONGO_WAIT_QUEUE_TIMEOUT_MS
+
+# Async handlers wait on the event loop instead of holding a threadpool
+# thread, so this pool is usually sized larger than the sync one
+MONGO_ASYNC_MAX_POOL_SIZE = int(os.getenv("MONGO_ASYNC_MAX_POOL_SIZE", "200"))
+
+async_client = AsyncIOMotorClient(
+    MONGO_URI,
+    maxPoolSize=MONGO_ASYNC_MAX_POOL_SIZE,
+    minPoolSize=MONGO_MIN_POOL_SIZE,
+    waitQueueTimeoutMS=MONGO_WAIT_QUEUE_TIMEOUT_MS
+)
+async_db = async_client["autostylist"]
+
+wardrobe_collection = async_db["wardrobe"]
+users_collection = async_db["users"]
+token_blocklist_collection = async_db["token_blocklist"]
+feedback_events_collection = async_db["feedback_events"]
+wardrobe_versions_collection = async_db["wardrobe_versions"]
+wardrobe_stats_collection = async_db["wardrobe_stats"]
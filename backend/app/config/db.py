@@ -6,9 +6,23 @@ load_dotenv()
 
 MONGO_URI = os.getenv("MONGO_URI")
 
-client = MongoClient(MONGO_URI)
+# Connection pool sizing (per process; the async client has its own pool)
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "10000"))
+
+client = MongoClient(
+    MONGO_URI,
+    maxPoolSize=MONGO_MAX_POOL_SIZE,
+    minPoolSize=MONGO_MIN_POOL_SIZE,
+    waitQueueTimeoutMS=MONGO_WAIT_QUEUE_TIMEOUT_MS
+)
 db = client["autostylist"]
 
 wardrobe_collection = db["wardrobe"]
 users_collection = db["users"]
 token_blocklist_collection = db["token_blocklist"]
+feedback_events_collection = db["feedback_events"]
+feedback_leases_collection = db["feedback_leases"]
+wardrobe_versions_collection = db["wardrobe_versions"]
+wardrobe_stats_collection = db["wardrobe_stats"]
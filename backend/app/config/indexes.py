@@ -0,0 +1,77 @@
+import logging
+
+from pymongo import ASCENDING, HASHED
+from pymongo.errors import PyMongoError
+
+from app.config.db import (
+    wardrobe_collection,
+    users_collection,
+    token_blocklist_collection,
+    feedback_events_collection
+)
+from app.services.auth_service import ACCESS_TOKEN_EXPIRE_MINUTES
+
+logger = logging.getLogger(__name__)
+
+
+# (collection, keys, options) for every index the hot queries rely on
+INDEXES = [
+    # get_current_user / login / register lookups
+    (users_collection, [("email", ASCENDING)], {"name": "email_unique", "unique": True}),
+
+    # Blocklist check on every authenticated request (equality only)
+    (token_blocklist_collection, [("token", HASHED)], {"name": "token_hashed"}),
+
+    # A blocklisted token is useless once the JWT itself has expired,
+    # so entries are dropped after the token lifetime
+    (
+        token_blocklist_collection,
+        [("blocklisted_at", ASCENDING)],
+        {"name": "blocklisted_at_ttl", "expireAfterSeconds": ACCESS_TOKEN_EXPIRE_MINUTES * 60}
+    ),
+
+    # /api/recommend fetch; its prefixes serve the wardrobe listing,
+    # per-category listing and stats queries
+    (
+        wardrobe_collection,
+        [
+            ("user_id", ASCENDING),
+            ("category", ASCENDING),
+            ("style", ASCENDING),
+            ("gender", ASCENDING)
+        ],
+        {"name": "user_category_style_gender"}
+    ),
+
+    # Wardrobe listing pages (cursor on _id)
+    (wardrobe_collection, [("user_id", ASCENDING), ("_id", ASCENDING)], {"name": "user_id_cursor"}),
+
+    # Feedback aggregator: pending / stale claims, then its own claim
+    (
+        feedback_events_collection,
+        [("status", ASCENDING), ("created_at", ASCENDING)],
+        {"name": "status_created_at"}
+    ),
+    (feedback_events_collection, [("claim", ASCENDING)], {"name": "claim"}),
+
+    # Per-user replay
+    (
+        feedback_events_collection,
+        [("user_id", ASCENDING), ("created_at", ASCENDING)],
+        {"name": "user_created_at"}
+    )
+]
+
+
+def ensure_indexes():
+    """
+    Create the indexes the hot queries rely on.
+    create_index is a no-op when the index already exists.
+    A failing index (e.g. duplicate emails blocking the unique index)
+    is logged so the API still starts.
+    """
+    for collection, keys, options in INDEXES:
+        try:
+            collection.create_index(keys, **options)
+        except PyMongoError as e:
+            logger.warning("Could not create index %s on %s: %s", options["name"], collection.name, e)
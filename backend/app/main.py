@@ -8,7 +8,13 @@ load_dotenv()
 
 from app.routes import upload, recommend, wardrobe
 from app.config.db import db
-from app.routes import feedback, auth
+from app.repositories import STORAGE_BACKEND
+from app.config.indexes import ensure_indexes
+from app.services.upload_queue import upload_queue
+from app.services.feedback_service import feedback_aggregator
+from app.routes import feedback, auth, plan, metrics, profiler
+from app.services.metrics import METRICS_ENABLED, MetricsMiddleware
+from app.services.profiler import PROFILER_ENABLED, ProfilerMiddleware
 
 app = FastAPI()
 
@@ -36,6 +42,42 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Sampling profiler for a share of requests (/admin/profile), off by default
+if PROFILER_ENABLED:
+    app.add_middleware(ProfilerMiddleware)
+
+# Request / stage timing (Server-Timing header + /metrics), off by default
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+@app.on_event("startup")
+def create_indexes():
+    if STORAGE_BACKEND != "memory":
+        ensure_indexes()
+
+
+@app.on_event("startup")
+async def start_upload_workers():
+    upload_queue.start()
+
+
+@app.on_event("shutdown")
+async def stop_upload_workers():
+    await upload_queue.stop()
+
+
+@app.on_event("startup")
+def start_feedback_aggregator():
+    # Folds events from MongoDB; the in-memory backend only records them
+    if STORAGE_BACKEND != "memory":
+        feedback_aggregator.start()
+
+
+@app.on_event("shutdown")
+def stop_feedback_aggregator():
+    feedback_aggregator.stop()
+
+
 # Root test
 @app.get("/")
 def home():
@@ -48,6 +90,13 @@ app.include_router(upload.router, prefix="/api")
 app.include_router(recommend.router, prefix="/api")
 app.include_router(feedback.router, prefix="/api")
 app.include_router(wardrobe.router, prefix="/api")
+app.include_router(plan.router, prefix="/api")
+
+if METRICS_ENABLED:
+    app.include_router(metrics.router)
+
+if PROFILER_ENABLED:
+    app.include_router(profiler.router)
 
 
 # Static files (processed images)
@@ -0,0 +1,47 @@
+import os
+
+# Where request handlers read and write data:
+#   "mongo":  MongoDB through the async (Motor) client
+#   "cached": MongoDB, with item queries answered from an in-memory copy
+#             of each active wardrobe (reloaded when its version changes)
+#   "memory": in-process only, nothing persisted (tests, benchmarks,
+#             offline load tests); background feedback aggregation is off
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "mongo")
+
+if STORAGE_BACKEND == "memory":
+    from app.repositories.memory import (
+        InMemoryUserRepository,
+        InMemoryTokenBlocklistRepository,
+        InMemoryWardrobeRepository,
+        InMemoryFeedbackRepository
+    )
+
+    user_repository = InMemoryUserRepository()
+    token_blocklist_repository = InMemoryTokenBlocklistRepository()
+    wardrobe_repository = InMemoryWardrobeRepository()
+    feedback_repository = InMemoryFeedbackRepository()
+
+else:
+    from app.config.async_db import (
+        wardrobe_collection,
+        users_collection,
+        token_blocklist_collection,
+        feedback_events_collection,
+        wardrobe_versions_collection,
+        wardrobe_stats_collection
+    )
+    from app.repositories.user_repository import UserRepository
+    from app.repositories.token_blocklist_repository import TokenBlocklistRepository
+    from app.repositories.wardrobe_repository import WardrobeRepository, CachedWardrobeRepository
+    from app.repositories.feedback_repository import FeedbackRepository
+
+    # Background work (feedback aggregator, scripts) keeps using the
+    # sync collections in app.config.db
+    user_repository = UserRepository(users_collection)
+    token_blocklist_repository = TokenBlocklistRepository(token_blocklist_collection)
+    wardrobe_repository = (CachedWardrobeRepository if STORAGE_BACKEND == "cached" else WardrobeRepository)(
+        wardrobe_collection,
+        wardrobe_versions_collection,
+        wardrobe_stats_collection
+    )
+    feedback_repository = FeedbackRepository(feedback_events_collection)
@@ -0,0 +1,11 @@
+class FeedbackRepository:
+    """
+    Async access to the feedback event log
+    """
+
+    def __init__(self, events):
+        self.events = events
+
+    async def insert_event(self, event: dict) -> dict:
+        await self.events.insert_one(event)
+        return event
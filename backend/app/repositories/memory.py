@@ -0,0 +1,266 @@
+from datetime import datetime
+from typing import Optional
+
+from bson.objectid import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+from app.services.wardrobe_stats import compute_stats
+
+# In-process implementations of the repositories, for running the API
+# (tests, benchmarks, load tests) without MongoDB. Queries use the same
+# Mongo filter documents as the real repositories; only the operators
+# the app uses are supported (no dotted paths, no array matching).
+
+OPERATORS = {
+    "$eq": lambda value, arg: value == arg,
+    "$ne": lambda value, arg: value != arg,
+    "$gt": lambda value, arg: value is not None and value > arg,
+    "$gte": lambda value, arg: value is not None and value >= arg,
+    "$lt": lambda value, arg: value is not None and value < arg,
+    "$lte": lambda value, arg: value is not None and value <= arg,
+    "$in": lambda value, arg: value in arg,
+    "$nin": lambda value, arg: value not in arg
+}
+
+
+def is_operator_dict(condition):
+    return isinstance(condition, dict) and condition and all(key.startswith("$") for key in condition)
+
+
+def matches(doc, query):
+    """
+    Whether doc satisfies a Mongo filter document
+    """
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(matches(doc, clause) for clause in condition):
+                return False
+            continue
+        if key == "$and":
+            if not all(matches(doc, clause) for clause in condition):
+                return False
+            continue
+
+        # A missing field compares as None, like in Mongo ({"$in": [None]})
+        value = doc.get(key)
+        if not is_operator_dict(condition):
+            if value != condition:
+                return False
+            continue
+
+        for op, arg in condition.items():
+            if op == "$exists":
+                if (key in doc) != bool(arg):
+                    return False
+            elif op not in OPERATORS:
+                raise ValueError(f"Unsupported query operator: {op}")
+            elif not OPERATORS[op](value, arg):
+                return False
+
+    return True
+
+
+def project(doc, projection):
+    """
+    Copy of doc with a Mongo inclusion or exclusion projection applied
+    """
+    if not projection:
+        return dict(doc)
+
+    included = {key for key, flag in projection.items() if flag}
+    if included - {"_id"}:
+        if projection.get("_id", 1):
+            included.add("_id")
+        # Keep the document's field order, like the server does
+        return {key: value for key, value in doc.items() if key in included}
+
+    excluded = {key for key, flag in projection.items() if not flag}
+    return {key: value for key, value in doc.items() if key not in excluded}
+
+
+def sort_docs(docs, sort):
+    """
+    sort: [(field, 1 | -1), ...]; missing fields sort first, as in Mongo
+    """
+    for field, direction in reversed(sort):
+        docs.sort(
+            key=lambda doc: (doc.get(field) is not None, doc.get(field)),
+            reverse=direction < 0
+        )
+    return docs
+
+
+def query_user_ids(query) -> Optional[set]:
+    """
+    user_ids a query is limited to, or None when it can match any user
+    """
+    if isinstance(query.get("user_id"), str):
+        return {query["user_id"]}
+    if "$or" in query:
+        user_ids = set()
+        for clause in query["$or"]:
+            found = query_user_ids(clause)
+            if found is None:
+                return None
+            user_ids |= found
+        return user_ids
+    return None
+
+
+# -------------------------------------------------
+# Users / Blocklist / Feedback
+# -------------------------------------------------
+
+class InMemoryUserRepository:
+
+    def __init__(self):
+        self._users = {}
+
+    async def find_by_email(self, email: str) -> Optional[dict]:
+        user = self._users.get(email)
+        return dict(user) if user else None
+
+    async def create(self, user: dict) -> dict:
+        # Same as the unique email index
+        if user["email"] in self._users:
+            raise DuplicateKeyError(f"duplicate email: {user['email']}")
+        user.setdefault("_id", ObjectId())
+        self._users[user["email"]] = dict(user)
+        return user
+
+
+class InMemoryTokenBlocklistRepository:
+
+    def __init__(self):
+        self._entries = []
+
+    async def add(self, entry: dict) -> dict:
+        self._entries.append(dict(entry))
+        return entry
+
+    async def find_since(self, since: Optional[datetime], projection: Optional[dict] = None) -> list:
+        return [
+            project(entry, projection) for entry in self._entries
+            if since is None or entry["blocklisted_at"] >= since
+        ]
+
+
+class InMemoryFeedbackRepository:
+    """
+    Events are kept but never aggregated; the aggregator only runs
+    against MongoDB
+    """
+
+    def __init__(self):
+        self.events = []
+
+    async def insert_event(self, event: dict) -> dict:
+        event.setdefault("_id", ObjectId())
+        self.events.append(event)
+        return event
+
+
+# -------------------------------------------------
+# Wardrobe
+# -------------------------------------------------
+
+class InMemoryWardrobeRepository:
+    """
+    Items indexed by user and category:
+
+        {user_id: {category: {_id: item}}}
+
+    so a query pinned to a user (and categories) only scans those
+    buckets before the full filter is applied. Stats are computed from
+    the index on read instead of being maintained incrementally.
+    """
+
+    def __init__(self):
+        self._users = {}
+        self._versions = {}
+
+    # Index maintenance
+
+    def _bucket(self, user_id, category):
+        return self._users.setdefault(user_id, {}).setdefault(category, {})
+
+    def _add(self, item):
+        # _id first, as stored by the server
+        self._bucket(item.get("user_id"), item.get("category"))[item["_id"]] = {"_id": item["_id"], **item}
+
+    def replace_user(self, user_id: str, items):
+        self._users[user_id] = {}
+        for item in items:
+            self._add(item)
+
+    def drop_user(self, user_id: str):
+        self._users.pop(user_id, None)
+
+    def _candidates(self, clause):
+        user_id = clause.get("user_id")
+        if not isinstance(user_id, str):
+            return [bucket for by_category in self._users.values() for bucket in by_category.values()]
+
+        by_category = self._users.get(user_id, {})
+        category = clause.get("category")
+        if isinstance(category, str):
+            names = [category]
+        elif isinstance(category, dict) and set(category) == {"$in"}:
+            names = category["$in"]
+        else:
+            names = list(by_category)
+        return [by_category[name] for name in names if name in by_category]
+
+    # Repository interface
+
+    async def find_items(self, query: dict, projection: Optional[dict] = None,
+                         sort: Optional[list] = None, limit: Optional[int] = None) -> list:
+        # A top-level $or is split so each clause can use the index
+        rest = {key: value for key, value in query.items() if key != "$or"}
+        if "$or" in query and not any(rest.keys() & clause.keys() for clause in query["$or"]):
+            clauses = [{**rest, **clause} for clause in query["$or"]]
+        else:
+            clauses = [query]
+
+        found = {}
+        for clause in clauses:
+            for bucket in self._candidates(clause):
+                for item_id, item in bucket.items():
+                    if item_id not in found and matches(item, clause):
+                        found[item_id] = item
+
+        # Unsorted reads come back in insertion (ObjectId) order
+        docs = sort_docs(list(found.values()), sort or [("_id", 1)])
+        if limit:
+            docs = docs[:limit]
+        return [project(doc, projection) for doc in docs]
+
+    async def insert_items(self, items: list, ordered: bool = True) -> list:
+        for item in items:
+            item.setdefault("_id", ObjectId())
+            self._add(item)
+        return items
+
+    async def delete_item(self, user_id: str, item_id, projection: Optional[dict] = None) -> Optional[dict]:
+        for bucket in self._users.get(user_id, {}).values():
+            if item_id in bucket:
+                return project(bucket.pop(item_id), projection)
+        return None
+
+    async def get_version(self, user_id: str) -> int:
+        return self._versions.get(user_id, 0)
+
+    async def bump_version(self, user_id: str) -> int:
+        self._versions[user_id] = self._versions.get(user_id, 0) + 1
+        return self._versions[user_id]
+
+    async def get_stats(self, user_id: str) -> dict:
+        return compute_stats(
+            item for bucket in self._users.get(user_id, {}).values() for item in bucket.values()
+        )
+
+    async def record_added(self, user_id: str, items: list):
+        pass
+
+    async def record_removed(self, user_id: str, item: dict):
+        pass
@@ -0,0 +1,22 @@
+from datetime import datetime
+from typing import Optional
+
+
+class TokenBlocklistRepository:
+    """
+    Async access to logged-out tokens
+    """
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+
+    async def add(self, entry: dict) -> dict:
+        await self.tokens.insert_one(entry)
+        return entry
+
+    async def find_since(self, since: Optional[datetime], projection: Optional[dict] = None) -> list:
+        """
+        Entries blocklisted at or after since (every entry for None)
+        """
+        query = {"blocklisted_at": {"$gte": since}} if since else {}
+        return await self.tokens.find(query, projection).to_list(length=None)
@@ -0,0 +1,22 @@
+from typing import Optional
+
+
+class UserRepository:
+    """
+    Async access to user documents
+    """
+
+    def __init__(self, users):
+        self.users = users
+
+    async def find_by_email(self, email: str) -> Optional[dict]:
+        return await self.users.find_one({"email": email})
+
+    async def create(self, user: dict) -> dict:
+        """
+        Sets _id on the user; a taken email raises DuplicateKeyError
+        (unique index)
+        """
+        result = await self.users.insert_one(user)
+        user["_id"] = result.inserted_id
+        return user
@@ -0,0 +1,136 @@
+import os
+from collections import OrderedDict
+from typing import Optional
+
+from pymongo import ReturnDocument
+
+from app.repositories.memory import InMemoryWardrobeRepository, query_user_ids
+from app.services.profiler import run_in_threadpool
+from app.services.wardrobe_stats import COUNTED, rebuild_stats, record_items_added, record_item_removed
+
+# Users whose wardrobe the cached backend keeps in memory (per worker)
+WARDROBE_CACHE_USERS = int(os.getenv("WARDROBE_CACHE_USERS", "256"))
+
+
+class WardrobeRepository:
+    """
+    Async access to wardrobe items and the per-user documents derived
+    from them (version counter, stats)
+    """
+
+    def __init__(self, items, versions, stats):
+        self.items = items
+        self.versions = versions
+        self.stats = stats
+
+    async def find_items(self, query: dict, projection: Optional[dict] = None,
+                         sort: Optional[list] = None, limit: Optional[int] = None) -> list:
+        cursor = self.items.find(query, projection)
+        if sort:
+            cursor = cursor.sort(sort)
+        if limit:
+            cursor = cursor.limit(limit)
+        return await cursor.to_list(length=None)
+
+    async def insert_items(self, items: list, ordered: bool = True) -> list:
+        """
+        Sets _id on each item; unordered inserts raise BulkWriteError
+        listing only the rejected documents
+        """
+        await self.items.insert_many(items, ordered=ordered)
+        return items
+
+    async def delete_item(self, user_id: str, item_id, projection: Optional[dict] = None) -> Optional[dict]:
+        return await self.items.find_one_and_delete(
+            {"_id": item_id, "user_id": user_id},
+            projection=projection
+        )
+
+    async def get_version(self, user_id: str) -> int:
+        doc = await self.versions.find_one({"_id": user_id})
+        return doc["version"] if doc else 0
+
+    async def bump_version(self, user_id: str) -> int:
+        doc = await self.versions.find_one_and_update(
+            {"_id": user_id},
+            {"$inc": {"version": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return doc["version"]
+
+    async def get_stats(self, user_id: str) -> dict:
+        stats = await self.stats.find_one({"_id": user_id}, {COUNTED: 0})
+        if stats is None or stats.get("building"):
+            # First read for this user: build the document once
+            stats = await run_in_threadpool(rebuild_stats, user_id)
+        return stats
+
+    # Stats upkeep shares wardrobe_stats with the feedback aggregator
+
+    async def record_added(self, user_id: str, items: list):
+        await run_in_threadpool(record_items_added, user_id, items)
+
+    async def record_removed(self, user_id: str, item: dict):
+        await run_in_threadpool(record_item_removed, user_id, item)
+
+
+class CachedWardrobeRepository(WardrobeRepository):
+    """
+    WardrobeRepository answering item queries from an in-memory copy of
+    recently active users' wardrobes.
+
+    The version counter is still read from MongoDB on every query, so a
+    change made by another worker (upload, delete, applied feedback)
+    reloads the copy on the next read. Least recently used wardrobes are
+    dropped beyond max_users.
+    """
+
+    def __init__(self, items, versions, stats, max_users=WARDROBE_CACHE_USERS):
+        super().__init__(items, versions, stats)
+        self.max_users = max_users
+        self.memory = InMemoryWardrobeRepository()
+        # user_id -> version its copy was loaded at
+        self._loaded = OrderedDict()
+
+    async def _ensure_loaded(self, user_id):
+        version = await self.get_version(user_id)
+        if self._loaded.get(user_id) == version:
+            self._loaded.move_to_end(user_id)
+            return
+
+        # Version first: the items read next are at least that new
+        items = await super().find_items({"user_id": user_id})
+        self.memory.replace_user(user_id, items)
+        self._loaded[user_id] = version
+        self._loaded.move_to_end(user_id)
+
+        while len(self._loaded) > self.max_users:
+            evicted, _ = self._loaded.popitem(last=False)
+            self.memory.drop_user(evicted)
+
+    def _forget(self, user_id):
+        self._loaded.pop(user_id, None)
+        self.memory.drop_user(user_id)
+
+    async def find_items(self, query: dict, projection: Optional[dict] = None,
+                         sort: Optional[list] = None, limit: Optional[int] = None) -> list:
+        user_ids = query_user_ids(query)
+        if not user_ids:
+            return await super().find_items(query, projection, sort, limit)
+
+        for user_id in user_ids:
+            await self._ensure_loaded(user_id)
+        return await self.memory.find_items(query, projection, sort, limit)
+
+    async def insert_items(self, items: list, ordered: bool = True) -> list:
+        try:
+            return await super().insert_items(items, ordered)
+        finally:
+            for user_id in {item["user_id"] for item in items}:
+                self._forget(user_id)
+
+    async def delete_item(self, user_id: str, item_id, projection: Optional[dict] = None) -> Optional[dict]:
+        item = await super().delete_item(user_id, item_id, projection)
+        self._forget(user_id)
+        return item
@@ -1,27 +1,31 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
+from pymongo.errors import DuplicateKeyError
 from app.models.user_model import UserCreate, UserLogin, User, Token
 from app.services.auth_service import (
     get_password_hash,
     verify_password,
     create_access_token,
     get_current_user,
+    blocklist_token,
     ACCESS_TOKEN_EXPIRE_MINUTES,
     oauth2_scheme
 )
-from app.config.db import users_collection, token_blocklist_collection
+from app.services.profiler import run_in_threadpool
+from app.repositories import user_repository
 from datetime import timedelta, datetime
 import jwt
 
 router = APIRouter()
 
 @router.post("/register", response_model=User, status_code=status.HTTP_201_CREATED)
-def register(user: UserCreate):
-    existing_user = users_collection.find_one({"email": user.email})
+async def register(user: UserCreate):
+    existing_user = await user_repository.find_by_email(user.email)
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    hashed_password = get_password_hash(user.password)
+    # Password hashing is deliberately slow; keep it off the event loop
+    hashed_password = await run_in_threadpool(get_password_hash, user.password)
     new_user = {
         "full_name": user.full_name,
         "email": user.email,
@@ -29,14 +33,17 @@ def register(user: UserCreate):
         "created_at": datetime.utcnow()
     }
 
-    result = users_collection.insert_one(new_user)
-    new_user["_id"] = result.inserted_id
+    try:
+        await user_repository.create(new_user)
+    except DuplicateKeyError:
+        # A concurrent registration won the unique email index
+        raise HTTPException(status_code=400, detail="Email already registered")
     
     return User(**new_user)
 
 @router.post("/login", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends()):
-    user = users_collection.find_one({"email": form_data.username})
+async def login(form_data: OAuth2PasswordRequestForm = Depends()):
+    user = await user_repository.find_by_email(form_data.username)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -45,7 +52,7 @@ def login(form_data: OAuth2PasswordRequestForm = Depends()):
         )
 
     try:
-        valid = verify_password(form_data.password, user.get("hashed_password", ""))
+        valid = await run_in_threadpool(verify_password, form_data.password, user.get("hashed_password", ""))
     except Exception as e:
         # avoid exposing internals
         raise HTTPException(
@@ -70,16 +77,12 @@ def login(form_data: OAuth2PasswordRequestForm = Depends()):
 
 
 @router.post("/logout")
-def logout(token: str = Depends(oauth2_scheme), current_user: dict = Depends(get_current_user)):
+async def logout(token: str = Depends(oauth2_scheme), current_user: dict = Depends(get_current_user)):
     """
     Invalidates the current JWT token by adding it to the blocklist.
     Requests MUST include a valid Authorization Bearer token to log out.
     """
-    token_blocklist_collection.insert_one({
-        "token": token,
-        "user_id": str(current_user["_id"]),
-        "blocklisted_at": datetime.utcnow()
-    })
+    await blocklist_token(token, str(current_user["_id"]))
     
     return {"message": "Successfully logged out"}
 
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Form
-from app.services.context_service import get_weather
+from typing import Optional
+from app.services.context_service import get_weather, normalize_city
 
 router = APIRouter()
 
@@ -7,11 +8,13 @@ VALID_OCCASIONS = ["casual", "office", "party", "traditional"]
 
 
 @router.post("/context")
-def get_context(occasion: str = Form(...)):
+def get_context(occasion: str = Form(...), city: Optional[str] = Form(None)):
     if occasion not in VALID_OCCASIONS:
         return {"error": "Invalid occasion"}
+    if city and normalize_city(city) is None:
+        return {"error": "Invalid city"}
 
-    weather_data = get_weather()
+    weather_data = get_weather(city)
 
     context = {
         "city": weather_data["city"],
@@ -0,0 +1,13 @@
+from fastapi import APIRouter, Response
+
+from app.services.metrics import render_metrics
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """
+    Prometheus scrape endpoint. Histograms are per worker process.
+    """
+    return Response(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
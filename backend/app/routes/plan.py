@@ -0,0 +1,107 @@
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import date
+from app.repositories import wardrobe_repository
+from app.services.auth_service import get_current_user
+from app.services.context_service import get_weather, normalize_city
+from app.services.planner import plan_outfits
+from app.services.metrics import stage
+from app.services.profiler import run_in_threadpool
+from app.routes.recommend import (
+    VALID_OCCASIONS,
+    ENGINE_PROJECTION,
+    build_wardrobe_query,
+    format_outfit
+)
+
+router = APIRouter()
+
+MAX_PLAN_SLOTS = 14
+
+
+class PlanSlot(BaseModel):
+    date: date
+    occasion: str
+
+
+class PlanPayload(BaseModel):
+    slots: List[PlanSlot]
+    gender: str = "male"
+    city: Optional[str] = None
+
+
+def build_plan_query(user_id, occasions, gender):
+    """
+    One query covering every occasion in the plan
+    """
+    clauses = []
+    for occasion in occasions:
+        for clause in build_wardrobe_query(user_id, occasion, gender)["$or"]:
+            if clause not in clauses:
+                clauses.append(clause)
+    return {"$or": clauses}
+
+
+# -------------------------------------------------
+# Planner Route
+# -------------------------------------------------
+@router.post("/plan")
+async def plan(
+    payload: PlanPayload,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    One outfit per (date, occasion) slot, e.g. the next 7 days.
+    The wardrobe is fetched and scored once for the whole plan;
+    items are rotated so nothing repeats while alternatives remain.
+    """
+    if not payload.slots:
+        raise HTTPException(status_code=400, detail="Provide at least one slot")
+    if len(payload.slots) > MAX_PLAN_SLOTS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_PLAN_SLOTS} slots per plan")
+
+    occasions = []
+    for slot in payload.slots:
+        if slot.occasion not in VALID_OCCASIONS:
+            return {"error": "Invalid occasion"}
+        if slot.occasion not in occasions:
+            occasions.append(slot.occasion)
+    if payload.city and normalize_city(payload.city) is None:
+        return {"error": "Invalid city"}
+
+    # Current weather is used for every slot (no forecast provider)
+    with stage("weather"):
+        weather = await run_in_threadpool(get_weather, payload.city)
+    context = {
+        "city": weather.get("city", "Unknown"),
+        "temperature": weather.get("temperature"),
+        "weather": weather.get("weather"),
+        "weather_type": weather.get("weather_type", "normal")
+    }
+
+    with stage("wardrobe"):
+        items = await wardrobe_repository.find_items(
+            build_plan_query(str(current_user["_id"]), occasions, payload.gender),
+            ENGINE_PROJECTION
+        )
+
+    slots = [{"date": slot.date, "occasion": slot.occasion} for slot in payload.slots]
+    with stage("scoring"):
+        outfits = await run_in_threadpool(plan_outfits, items, slots, payload.gender, context["weather_type"])
+
+    days = []
+    for slot, outfit in zip(slots, outfits):
+        day = {
+            "date": slot["date"].isoformat(),
+            "occasion": slot["occasion"],
+            "outfit": format_outfit(outfit)
+        }
+        if outfit is None:
+            day["error"] = "Not enough wardrobe items for this occasion"
+        days.append(day)
+
+    return {
+        "context": context,
+        "plan": days
+    }
@@ -0,0 +1,29 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+
+from app.services.profiler import is_admin_token, stacks
+
+router = APIRouter()
+
+
+def require_admin(x_profile_token: Optional[str] = Header(None)):
+    if not is_admin_token(x_profile_token):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+@router.get("/admin/profile", include_in_schema=False, dependencies=[Depends(require_admin)])
+def get_profile(route: Optional[str] = None):
+    """
+    Collapsed stacks of the profiled requests in this worker process
+    ("GET /api/recommend;module:function;... count" per line), e.g.
+    flamegraph.pl profile.txt > profile.svg. route limits the output to
+    one root, e.g. ?route=POST /api/recommend
+    """
+    return Response(stacks.collapsed(route), media_type="text/plain")
+
+
+@router.delete("/admin/profile", include_in_schema=False, dependencies=[Depends(require_admin)])
+def clear_profile():
+    stacks.clear()
+    return {"message": "Profile cleared"}
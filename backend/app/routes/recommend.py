@@ -1,104 +1,142 @@
-from fastapi import APIRouter, Form, Depends
-from app.services.context_service import get_weather
-from app.config.db import wardrobe_collection
+from fastapi import APIRouter, Form, Depends, Response
+from typing import Optional
+from app.services.context_service import get_weather, normalize_city
 from app.services.auth_service import get_current_user
-from app.services.decision_engine import generate_ranked_outfits
-from app.services.accessories_engine import (
-    select_best_shoes,
-    select_accessories,
-    select_jewellery
-)
+from app.repositories import wardrobe_repository
+from app.services.recommendation_cache import recommendation_cache
+from app.services.decision_engine import rank_outfits
+from app.services.accessories_engine import select_extras_batch
+from app.services.composition_engine import COMPOSITION_MODE, compose_outfits
+from app.services.planner import FULL_BODY_CATEGORIES, partition_items
+from app.services.metrics import stage
+from app.services.profiler import run_in_threadpool
 
 router = APIRouter()
 
 VALID_OCCASIONS = ["casual", "office", "party", "traditional"]
 
-
-@router.post("/recommend")
-def recommend_outfit(
-    occasion: str = Form(...),
-    gender: str = Form("male"),
-    current_user: dict = Depends(get_current_user)
-):
-
-    # -----------------------------
-    # Validate input
-    # -----------------------------
-    if occasion not in VALID_OCCASIONS:
-        return {"error": "Invalid occasion"}
-
-    # -----------------------------
-    # Module 2 — Context
-    # -----------------------------
-    weather = get_weather()
-
-    context = {
-        "city": weather.get("city", "Unknown"),
-        "temperature": weather.get("temperature"),
-        "weather": weather.get("weather"),
-        "weather_type": weather.get("weather_type", "normal"),
-        "occasion": occasion
-    }
-
-    # -----------------------------
+EXTRA_CATEGORIES = ["shoes", "accessories", "jewellery"]
+
+# Only the fields the decision / accessories engines and the response use
+ENGINE_PROJECTION = {
+    "category": 1,
+    "style": 1,
+    "gender": 1,
+    "image_path": 1,
+    "dominant_color": 1,
+    "colors": 1,
+    "features": 1,
+    "preference_score": 1,
+    "usage_count": 1,
+    "last_used": 1,
+    "shoe_type": 1
+}
+
+
+def build_wardrobe_query(user_id, occasion, gender):
+    """
+    One query for every category the recommendation needs
+    """
     # Style mapping for filtering
-    # -----------------------------
     style_map = {
         "casual": "casual",
         "office": "formal",
         "party": "party",
         "traditional": "traditional"
     }
-
     style_filter = style_map.get(occasion, "casual")
 
-    # -----------------------------
+    gender_filter = {"$in": [gender, "unisex", None]}
+
+    # user_id is repeated in every clause so each one can use the
+    # (user_id, category, style, gender) index on its own
+    clauses = [
+        {"user_id": user_id, "category": {"$in": ["top", "bottom"]}, "style": style_filter, "gender": gender_filter},
+        {"user_id": user_id, "category": {"$in": EXTRA_CATEGORIES}, "gender": gender_filter}
+    ]
+
     # Full Body Logic for Female Traditional
-    # -----------------------------
-    full_body_items = []
     if gender == "female" and occasion == "traditional":
-        full_body_items = list(wardrobe_collection.find({
-            "user_id": str(current_user["_id"]),
-            "category": {"$in": ["full_body", "saree", "lehenga"]},
-            "gender": gender
-        }))
+        clauses.append({"user_id": user_id, "category": {"$in": FULL_BODY_CATEGORIES}, "gender": gender})
 
-    gender_filter = {"$in": [gender, "unisex", None]}
+    return {"$or": clauses}
+
+
+def set_cache_headers(response, hit):
+    stats = recommendation_cache.stats()
+    response.headers["X-Cache"] = "HIT" if hit else "MISS"
+    response.headers["X-Cache-Hits"] = str(stats["hits"])
+    response.headers["X-Cache-Misses"] = str(stats["misses"])
 
-    # -----------------------------
-    # Fetch wardrobe data
-    # -----------------------------
-    tops = list(wardrobe_collection.find({
-        "user_id": str(current_user["_id"]),
-        "category": "top",
-        "style": style_filter,
-        "gender": gender_filter
-    }))
-
-    bottoms = list(wardrobe_collection.find({
-        "user_id": str(current_user["_id"]),
-        "category": "bottom",
-        "style": style_filter,
-        "gender": gender_filter
-    }))
-
-    shoes = list(wardrobe_collection.find({
-        "user_id": str(current_user["_id"]),
-        "category": "shoes",
-        "gender": gender_filter
-    }))
-
-    accessories = list(wardrobe_collection.find({
-        "user_id": str(current_user["_id"]),
-        "category": "accessories",
-        "gender": gender_filter
-    }))
-
-    jewellery = list(wardrobe_collection.find({
-        "user_id": str(current_user["_id"]),
-        "category": "jewellery",
-        "gender": gender_filter
-    }))
+
+# -----------------------------
+# Response Formatter
+# -----------------------------
+def format_outfit(outfit):
+    if not outfit:
+        return None
+        
+    # Extras selected specifically for this outfit configuration
+    selected = outfit["extras"]
+    selected_shoes = selected["shoes"]
+    selected_accessories = selected["accessories"]
+    selected_jewellery = selected["jewellery"]
+    
+    extras = {
+        "shoes": {
+            "id": str(selected_shoes["_id"]) if selected_shoes else None,
+            "image_path": selected_shoes.get("image_path") if selected_shoes else None
+        } if selected_shoes else None,
+        "accessories": [
+            {
+                "id": str(item["_id"]),
+                "image_path": item.get("image_path")
+            } for item in selected_accessories
+        ] if selected_accessories else [],
+        "jewellery": {
+            "id": str(selected_jewellery["_id"]) if selected_jewellery else None,
+            "image_path": selected_jewellery.get("image_path") if selected_jewellery else None
+        } if selected_jewellery else None
+    }
+
+    if "full_body" in outfit:
+         return {
+             "top": {
+                 "id": str(outfit["full_body"]["_id"]),
+                 "image_path": outfit["full_body"].get("image_path")
+             },
+             "bottom": None,
+             "score": outfit["score"],
+             "extras": extras
+         }
+    return {
+        "top": {
+            "id": str(outfit["top"]["_id"]),
+            "image_path": outfit["top"].get("image_path")
+        },
+        "bottom": {
+            "id": str(outfit["bottom"]["_id"]),
+            "image_path": outfit["bottom"].get("image_path")
+        },
+        "score": outfit["score"],
+        "extras": extras
+    }
+
+
+def build_recommendations(items, context):
+    """
+    Scores the fetched wardrobe items and formats best / medium / average,
+    or returns {"error": ...} when no outfit can be built
+    """
+    # Partition in memory by category
+    by_category = partition_items(items)
+
+    full_body_items = by_category.get("full_body", [])
+    tops = by_category.get("top", [])
+    bottoms = by_category.get("bottom", [])
+    shoes = by_category.get("shoes", [])
+    accessories = by_category.get("accessories", [])
+    jewellery = by_category.get("jewellery", [])
 
     if full_body_items:
         # Sort by preference score (descending)
@@ -115,10 +153,11 @@ def recommend_outfit(
         if not tops or not bottoms:
             return {"error": "Not enough wardrobe items for this occasion"}
 
-        # -----------------------------
-        # Module 3 — Outfit Decision
-        # -----------------------------
-        ranked_outfits = generate_ranked_outfits(tops, bottoms, context)
+        with stage("scoring"):
+            if COMPOSITION_MODE == "joint":
+                ranked_outfits = compose_outfits(tops, bottoms, shoes, accessories, jewellery, context)
+            else:
+                ranked_outfits = rank_outfits(tops, bottoms, context)
 
     if not ranked_outfits:
         return {"error": "No suitable outfit found"}
@@ -128,63 +167,89 @@ def recommend_outfit(
     medium = ranked_outfits[1] if len(ranked_outfits) > 1 else None
     average = ranked_outfits[2] if len(ranked_outfits) > 2 else None
 
+    # Extras for all returned outfits are scored together
+    # (joint composition has already picked them)
+    missing = [outfit for outfit in (best, medium, average) if outfit and "extras" not in outfit]
+    with stage("extras"):
+        batch = select_extras_batch(missing, shoes, accessories, jewellery, context)
+    for outfit, extras in zip(missing, batch):
+        outfit["extras"] = extras
+
+    return {
+        "best": format_outfit(best),
+        "medium": format_outfit(medium),
+        "average": format_outfit(average)
+    }
+
+
+@router.post("/recommend")
+async def recommend_outfit(
+    response: Response,
+    occasion: str = Form(...),
+    gender: str = Form("male"),
+    city: Optional[str] = Form(None),
+    current_user: dict = Depends(get_current_user)
+):
+
     # -----------------------------
-    # Response Formatter
+    # Validate input
     # -----------------------------
-    def format_outfit(outfit):
-        if not outfit:
-            return None
-            
-        # Select extras specifically for this outfit configuration
-        selected_shoes = select_best_shoes(shoes, outfit, context)
-        selected_accessories = select_accessories(accessories, outfit, context, limit=1)
-        selected_jewellery = select_jewellery(jewellery, outfit, context)
-        
-        extras = {
-            "shoes": {
-                "id": str(selected_shoes["_id"]) if selected_shoes else None,
-                "image_path": selected_shoes.get("image_path") if selected_shoes else None
-            } if selected_shoes else None,
-            "accessories": [
-                {
-                    "id": str(item["_id"]),
-                    "image_path": item.get("image_path")
-                } for item in selected_accessories
-            ] if selected_accessories else [],
-            "jewellery": {
-                "id": str(selected_jewellery["_id"]) if selected_jewellery else None,
-                "image_path": selected_jewellery.get("image_path") if selected_jewellery else None
-            } if selected_jewellery else None
-        }
+    if occasion not in VALID_OCCASIONS:
+        return {"error": "Invalid occasion"}
+    if city and normalize_city(city) is None:
+        return {"error": "Invalid city"}
+
+    # -----------------------------
+    # Module 2 — Context
+    # -----------------------------
+    # May call the weather API on a cache miss
+    with stage("weather"):
+        weather = await run_in_threadpool(get_weather, city)
+
+    context = {
+        "city": weather.get("city", "Unknown"),
+        "temperature": weather.get("temperature"),
+        "weather": weather.get("weather"),
+        "weather_type": weather.get("weather_type", "normal"),
+        "occasion": occasion
+    }
 
-        if "full_body" in outfit:
-             return {
-                 "top": {
-                     "id": str(outfit["full_body"]["_id"]),
-                     "image_path": outfit["full_body"].get("image_path")
-                 },
-                 "bottom": None,
-                 "score": outfit["score"],
-                 "extras": extras
-             }
+    # -----------------------------
+    # Cached result for this wardrobe version
+    # -----------------------------
+    user_id = str(current_user["_id"])
+    with stage("cache"):
+        cache_key = recommendation_cache.key(
+            user_id, occasion, gender, context["weather_type"],
+            await wardrobe_repository.get_version(user_id)
+        )
+        cached = recommendation_cache.get(cache_key)
+    set_cache_headers(response, cached is not None)
+    if cached is not None:
         return {
-            "top": {
-                "id": str(outfit["top"]["_id"]),
-                "image_path": outfit["top"].get("image_path")
-            },
-            "bottom": {
-                "id": str(outfit["bottom"]["_id"]),
-                "image_path": outfit["bottom"].get("image_path")
-            },
-            "score": outfit["score"],
-            "extras": extras
+            "context": context,
+            "recommendations": cached
         }
 
+    # -----------------------------
+    # Fetch wardrobe data (single query)
+    # -----------------------------
+    with stage("wardrobe"):
+        items = await wardrobe_repository.find_items(
+            build_wardrobe_query(user_id, occasion, gender),
+            ENGINE_PROJECTION
+        )
+
+    # -----------------------------
+    # Module 3 — Outfit Decision (CPU bound, off the event loop)
+    # -----------------------------
+    recommendations = await run_in_threadpool(build_recommendations, items, context)
+    if "error" in recommendations:
+        return recommendations
+
+    recommendation_cache.set(cache_key, recommendations)
+
     return {
         "context": context,
-        "recommendations": {
-            "best": format_outfit(best),
-            "medium": format_outfit(medium),
-            "average": format_outfit(average)
-        }
+        "recommendations": recommendations
     }
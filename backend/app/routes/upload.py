@@ -1,26 +1,24 @@
 from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException
-import os
-import shutil
-import uuid
-from datetime import datetime
-import cloudinary
-import cloudinary.uploader
-
-from app.services.image_service import process_image
-from app.services.color_service import extract_dominant_colors
-from app.config.db import wardrobe_collection
-from app.services.auth_service import get_current_user
+from typing import List, Optional
+import asyncio
 
-# Configure Cloudinary globally or here
-cloudinary.config(
-    cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
-    api_key=os.getenv("CLOUDINARY_API_KEY"),
-    api_secret=os.getenv("CLOUDINARY_API_SECRET"),
-    secure=True
-)
+from app.services.upload_queue import upload_queue
+from app.services.auth_service import get_current_user
 
 router = APIRouter()
 
+ALLOWED_TYPES = ["image/jpeg", "image/png", "image/webp"]
+MAX_BULK_FILES = 50
+
+
+def job_response(job):
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "result": job["result"],
+        "error": job["error"]
+    }
+
 
 @router.post("/upload")
 async def upload_item(
@@ -31,49 +29,91 @@ async def upload_item(
     current_user: dict = Depends(get_current_user)
 ):
 
-    ALLOWED_TYPES = ["image/jpeg", "image/png", "image/webp"]
-
     if file.content_type not in ALLOWED_TYPES:
         return {"error": "Only JPG, PNG, WEBP allowed"}
 
-    # The existing image_service logic saves locally, which is fine temporarily 
-    # for background removal or we can push the raw file direct.
-    # Assuming `process_image` removes background and saves a local file.
-    processed_path = process_image(file)
+    data = await file.read()
 
-    # Extract colors from the local processed file
-    colors = extract_dominant_colors(processed_path)
-    
-    # Upload to Cloudinary
+    # Background removal, color extraction, Cloudinary upload and the DB insert
+    # run on the upload workers; poll /api/upload/{job_id} for the result
     try:
-        upload_result = cloudinary.uploader.upload(processed_path, folder="autostylist_wardrobe")
-        cloudinary_url = upload_result.get("secure_url")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Cloudinary upload failed: {str(e)}")
-        
-    # Optional: Clean up the local processed file if we no longer need it.
-    if os.path.exists(processed_path):
-        os.remove(processed_path)
-
-    # Store in DB
-    item = {
-        "user_id": str(current_user["_id"]),
-        "category": category,
-        "style": style,
-        "gender": gender,
-        "colors": colors,
-        "dominant_color": colors[0],
-        "color_count": len(colors),
-        "image_path": cloudinary_url,
-        "preference_score": 0,
-        "usage_count": 0,
-        "created_at": datetime.utcnow()
+        job = upload_queue.submit(
+            str(current_user["_id"]),
+            data,
+            {"category": category, "style": style, "gender": gender}
+        )
+    except asyncio.QueueFull:
+        raise HTTPException(status_code=503, detail="Too many uploads in progress, please retry shortly")
+
+    return {
+        "message": "Upload queued",
+        **job_response(job)
     }
 
-    wardrobe_collection.insert_one(item)
+
+def per_file(values, count, default):
+    """
+    Form lists may be omitted (default), given once (applies to every file)
+    or given once per file
+    """
+    if not values:
+        return [default] * count
+    if len(values) == 1:
+        return values * count
+    if len(values) != count:
+        raise HTTPException(status_code=400, detail="Provide one value per file")
+    return values
+
+
+@router.post("/upload/bulk")
+async def upload_bulk(
+    files: List[UploadFile] = File(...),
+    categories: List[str] = Form(...),
+    styles: Optional[List[str]] = Form(None),
+    genders: Optional[List[str]] = Form(None),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Upload many garments in one request. Returns a job id; the job result
+    reports every file separately so one bad image doesn't fail the rest.
+    """
+    if len(files) > MAX_BULK_FILES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_FILES} files per request")
+
+    categories = per_file(categories, len(files), None)
+    styles = per_file(styles, len(files), "casual")
+    genders = per_file(genders, len(files), "male")
+
+    entries = []
+    rejected = []
+    for i, file in enumerate(files):
+        if file.content_type not in ALLOWED_TYPES:
+            rejected.append({"index": i, "filename": file.filename, "error": "Only JPG, PNG, WEBP allowed"})
+            continue
+        entries.append((
+            await file.read(),
+            {"index": i, "category": categories[i], "style": styles[i], "gender": genders[i]}
+        ))
+
+    if not entries:
+        return {"error": "No valid images in upload", "rejected": rejected}
+
+    try:
+        job = upload_queue.submit_batch(str(current_user["_id"]), entries)
+    except asyncio.QueueFull:
+        raise HTTPException(status_code=503, detail="Too many uploads in progress, please retry shortly")
 
     return {
-        "message": "Upload successful",
-        "colors": colors,
-        "image": item["image_path"]
+        "message": "Upload queued",
+        "rejected": rejected,
+        **job_response(job)
     }
+
+
+@router.get("/upload/{job_id}")
+def upload_status(job_id: str, current_user: dict = Depends(get_current_user)):
+    job = upload_queue.get_job(job_id)
+    if not job or job["user_id"] != str(current_user["_id"]):
+        raise HTTPException(status_code=404, detail="Upload job not found")
+
+    return job_response(job)
@@ -1,65 +1,148 @@
-from fastapi import APIRouter, Depends, HTTPException
-from app.config.db import wardrobe_collection
+import hashlib
+import json
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Response
+from pymongo import ASCENDING
+from bson.objectid import ObjectId
+from bson.errors import InvalidId
 from app.services.auth_service import get_current_user
-from typing import List
+from app.services.wardrobe_stats import STATS_PROJECTION, format_stats
+from app.repositories import wardrobe_repository
+from typing import List, Optional
 
 router = APIRouter()
 
+MAX_PAGE_SIZE = 200
+
+# Internal fields (engine scoring features, feedback bookkeeping), never sent to clients
+INTERNAL_FIELDS = ["features", "applied_changes"]
+LISTING_PROJECTION = {name: 0 for name in INTERNAL_FIELDS}
+
+
+def parse_fields(fields):
+    """
+    "category,image_path" -> Mongo projection (every field except the
+    internal ones when omitted)
+    """
+    if not fields:
+        return LISTING_PROJECTION
+    names = [name.strip() for name in fields.split(",")]
+    projection = {
+        name: 1 for name in names
+        if name and not name.startswith("$") and name.split(".")[0] not in INTERNAL_FIELDS
+    }
+    return projection or LISTING_PROJECTION
+
+
+def wardrobe_etag(user_id, version, params):
+    """
+    Changes whenever the wardrobe version or the listing parameters do.
+    The user is part of the digest, so users at the same version never
+    share a tag.
+    """
+    key = json.dumps({"user_id": user_id, "params": params}, sort_keys=True)
+    digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+    return f'W/"{version}-{digest}"'
+
+
+def etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return etag in candidates or "*" in candidates
+
+
 @router.get("/wardrobe")
-def get_wardrobe(current_user: dict = Depends(get_current_user)):
-    """Fetch all wardrobe items for the current user."""
-    items_cursor = wardrobe_collection.find({"user_id": str(current_user["_id"])})
-    items = []
-    for doc in items_cursor:
+async def get_wardrobe(
+    response: Response,
+    after: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = None,
+    category: Optional[str] = None,
+    style: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Fetch wardrobe items for the current user.
+
+    - after / limit: cursor pagination in _id order; next_cursor is the
+      `after` for the following page (None on the last page)
+    - fields: comma-separated projection, e.g. "category,image_path"
+    - category / style: filters applied in the query
+    - If-None-Match: 304 while the wardrobe version is unchanged,
+      without reading any item documents
+    """
+    user_id = str(current_user["_id"])
+
+    params = {"after": after, "limit": limit, "fields": fields, "category": category, "style": style}
+    etag = wardrobe_etag(user_id, await wardrobe_repository.get_version(user_id), params)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Vary": "Authorization"})
+
+    query = {"user_id": user_id}
+    if category:
+        query["category"] = category
+    if style:
+        query["style"] = style
+    if after:
+        try:
+            query["_id"] = {"$gt": ObjectId(after)}
+        except (InvalidId, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    # One extra document tells whether another page exists
+    items = await wardrobe_repository.find_items(
+        query,
+        parse_fields(fields),
+        sort=[("_id", ASCENDING)],
+        limit=limit + 1 if limit else None
+    )
+    for doc in items:
         doc["_id"] = str(doc["_id"])
-        items.append(doc)
-    return {"items": items}
+
+    next_cursor = None
+    if limit and len(items) > limit:
+        items = items[:limit]
+        next_cursor = items[-1]["_id"]
+
+    response.headers["ETag"] = etag
+    # Browsers keep the copy but must revalidate it with If-None-Match
+    response.headers["Cache-Control"] = "private, no-cache"
+    response.headers["Vary"] = "Authorization"
+    return {"items": items, "next_cursor": next_cursor}
 
 @router.get("/wardrobe/{category}")
-def get_wardrobe_by_category(category: str, current_user: dict = Depends(get_current_user)):
+async def get_wardrobe_by_category(category: str, current_user: dict = Depends(get_current_user)):
     """Fetch wardrobe items by category for the current user."""
-    items_cursor = wardrobe_collection.find({
+    items = await wardrobe_repository.find_items({
         "user_id": str(current_user["_id"]),
         "category": category
-    })
-    items = []
-    for doc in items_cursor:
+    }, LISTING_PROJECTION)
+    for doc in items:
         doc["_id"] = str(doc["_id"])
-        items.append(doc)
     return {"items": items}
 
 @router.get("/stats")
-def get_wardrobe_stats(current_user: dict = Depends(get_current_user)):
-    """Fetch wardrobe statistics for the current user."""
-    pipeline = [
-        {"$match": {"user_id": str(current_user["_id"])}},
-        {"$group": {"_id": "$category", "count": {"$sum": 1}}}
-    ]
-    stats_cursor = wardrobe_collection.aggregate(pipeline)
-    
-    # We also want total items
-    total_items = wardrobe_collection.count_documents({"user_id": str(current_user["_id"])})
-    
-    category_counts = {}
-    for stat in stats_cursor:
-        category_counts[stat["_id"]] = stat["count"]
-        
-    return {
-        "total": total_items,
-        "categories": category_counts
-    }
+async def get_wardrobe_stats(current_user: dict = Depends(get_current_user)):
+    """Fetch wardrobe statistics for the current user (one document read)."""
+    stats = await wardrobe_repository.get_stats(str(current_user["_id"]))
+    return format_stats(stats)
 
 @router.delete("/wardrobe/{item_id}")
-def delete_wardrobe_item(item_id: str, current_user: dict = Depends(get_current_user)):
+async def delete_wardrobe_item(item_id: str, current_user: dict = Depends(get_current_user)):
     """Delete a wardrobe item for the current user."""
-    from bson.objectid import ObjectId
     try:
-        result = wardrobe_collection.delete_one({
-            "_id": ObjectId(item_id),
-            "user_id": str(current_user["_id"])
-        })
-        if result.deleted_count == 0:
-            raise HTTPException(status_code=404, detail="Item not found or unauthorized")
-        return {"message": "Item deleted successfully"}
-    except Exception as e:
+        obj_id = ObjectId(item_id)
+    except (InvalidId, TypeError):
         raise HTTPException(status_code=400, detail="Invalid item ID")
+
+    user_id = str(current_user["_id"])
+
+    # The deleted document's fields are needed to decrement the stats
+    item = await wardrobe_repository.delete_item(user_id, obj_id, STATS_PROJECTION)
+    if item is None:
+        raise HTTPException(status_code=404, detail="Item not found or unauthorized")
+
+    await wardrobe_repository.bump_version(user_id)
+    await wardrobe_repository.record_removed(user_id, item)
+    return {"message": "Item deleted successfully"}
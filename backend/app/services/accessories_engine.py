@@ -1,26 +1,18 @@
-import math
+import numpy as np
+
+from app.services.decision_engine import get_item_features
+from app.services.color_space import (
+    is_neutral,
+    pack_colors,
+    harmony,
+    harmony_matrix,
+    rgb_harmony
+)
 
 # -----------------------------
 # Utility Functions
 # -----------------------------
 
-def normalize_rgb(rgb):
-    if not rgb or len(rgb) != 3:
-        return [0, 0, 0]
-    return [x / 255.0 for x in rgb]
-
-
-def color_distance(c1, c2):
-    return math.sqrt(sum((a - b) ** 2 for a, b in zip(c1, c2)))
-
-
-def is_neutral(rgb):
-    if not rgb or len(rgb) != 3:
-        return True
-    r, g, b = rgb
-    return abs(r - g) < 15 and abs(g - b) < 15
-
-
 def color_match_score(c1, c2):
     """
     Returns value between 0 and 1
@@ -28,8 +20,7 @@ def color_match_score(c1, c2):
     if not c1 or not c2:
         return 0
 
-    dist = color_distance(normalize_rgb(c1), normalize_rgb(c2))
-    base_score = max(0.0, 1.0 - dist)
+    base_score = rgb_harmony(c1, c2)
     
     # Neutral matching means it can go with anything seamlessly
     if is_neutral(c1) or is_neutral(c2):
@@ -38,6 +29,30 @@ def color_match_score(c1, c2):
     return min(1.0, base_score)
 
 
+def features_match_score(f1, f2):
+    """
+    color_match_score on precomputed item features
+    """
+    if not f1["has_color"] or not f2["has_color"]:
+        return 0
+
+    base_score = harmony(f1, f2)
+
+    if f1["neutral"] or f2["neutral"]:
+        base_score += 0.3
+
+    return min(1.0, base_score)
+
+
+def outfit_features(outfit):
+    """
+    Features of the piece extras are matched against
+    """
+    if "full_body" in outfit:
+        return get_item_features(outfit["full_body"])
+    return get_item_features(outfit["top"])
+
+
 # -----------------------------
 # Shoes Selection
 # -----------------------------
@@ -49,17 +64,14 @@ def select_best_shoes(shoes, outfit, context):
     best_score = -1
     selected = None
 
-    if "full_body" in outfit:
-        top_color = outfit["full_body"].get("dominant_color")
-    else:
-        top_color = outfit["top"].get("dominant_color")
+    top_features = outfit_features(outfit)
 
     for shoe in shoes:
-        shoe_color = shoe.get("dominant_color")
-        score = color_match_score(top_color, shoe_color)
+        shoe_features = get_item_features(shoe)
+        score = features_match_score(top_features, shoe_features)
 
         # Neutral shoes bonus
-        if is_neutral(shoe_color):
+        if shoe_features["neutral"]:
             score += 0.2
 
         # Weather rule (fixed)
@@ -89,16 +101,12 @@ def select_accessories(accessories, outfit, context, limit=1):
     if not accessories:
         return []
 
-    if "full_body" in outfit:
-        top_color = outfit["full_body"].get("dominant_color")
-    else:
-        top_color = outfit["top"].get("dominant_color")
+    top_features = outfit_features(outfit)
 
     scored_accessories = []
     
     for acc in accessories:
-        acc_color = acc.get("dominant_color")
-        score = color_match_score(top_color, acc_color)
+        score = features_match_score(top_features, get_item_features(acc))
         
         # Occasion matching bonus
         if acc.get("style") == context.get("occasion"):
@@ -129,14 +137,10 @@ def select_jewellery(jewellery, outfit, context):
     best_score = -1
     selected = None
 
-    if "full_body" in outfit:
-        top_color = outfit["full_body"].get("dominant_color")
-    else:
-        top_color = outfit["top"].get("dominant_color")
+    top_features = outfit_features(outfit)
 
     for item in jewellery:
-        item_color = item.get("dominant_color")
-        score = color_match_score(top_color, item_color)
+        score = features_match_score(top_features, get_item_features(item))
 
         if item.get("style") == occasion:
             score += 0.5
@@ -148,3 +152,114 @@ def select_jewellery(jewellery, outfit, context):
             selected = item
 
     return selected
+
+
+# -----------------------------
+# Batched Selection (all outfits at once)
+# -----------------------------
+
+def pack_extras(items, occasion):
+    """
+    Per-item arrays for one category of extras
+    """
+    features = [get_item_features(item) for item in items]
+    return {
+        "color": pack_colors(features),
+        "neutral": np.array([f["neutral"] for f in features], dtype=bool),
+        "has_color": np.array([f["has_color"] for f in features], dtype=bool),
+        "style_match": np.array([item.get("style") == occasion for item in items], dtype=bool),
+        "preference": np.array([item.get("preference_score", 0) for item in items], dtype=float),
+        "open": np.array([item.get("shoe_type") == "open" for item in items], dtype=bool)
+    }
+
+
+def pack_outfits(outfits):
+    """
+    Per-outfit arrays of the features extras are matched against
+    """
+    features = [outfit_features(outfit) for outfit in outfits]
+    return {
+        "color": pack_colors(features),
+        "neutral": np.array([f["neutral"] for f in features], dtype=bool),
+        "has_color": np.array([f["has_color"] for f in features], dtype=bool)
+    }
+
+
+def match_matrix(outfit_pack, item_pack):
+    """
+    features_match_score for every outfit x item pair
+    """
+    base_score = harmony_matrix(outfit_pack["color"], item_pack["color"])
+
+    # Neutral matching means it can go with anything seamlessly
+    neutral = outfit_pack["neutral"][:, None] | item_pack["neutral"][None, :]
+    base_score = base_score + np.where(neutral, 0.3, 0.0)
+    base_score = np.minimum(1.0, base_score)
+
+    has_color = outfit_pack["has_color"][:, None] & item_pack["has_color"][None, :]
+    return np.where(has_color, base_score, 0.0)
+
+
+def extras_score_matrix(outfit_pack, item_pack, neutral_bonus=0.0):
+    """
+    Same additions, in the same order, as the per-outfit selectors
+    """
+    score = match_matrix(outfit_pack, item_pack)
+    score = score + np.where(item_pack["neutral"], neutral_bonus, 0.0)[None, :]
+    score = score + np.where(item_pack["style_match"], 0.5, 0.0)[None, :]
+    score = score + (item_pack["preference"] * 0.1)[None, :]
+    return score
+
+
+def pick_best(items, scores, allowed=None):
+    """
+    First item with the highest score above -1 per outfit
+    (the per-outfit selectors start from best_score = -1)
+    """
+    if allowed is not None:
+        scores = np.where(allowed[None, :], scores, -np.inf)
+    best = np.argmax(scores, axis=1)
+    return [
+        items[j] if scores[i, j] > -1 else None
+        for i, j in enumerate(best)
+    ]
+
+
+def select_extras_batch(outfits, shoes, accessories, jewellery, context, accessory_limit=1):
+    """
+    select_best_shoes / select_accessories / select_jewellery for every
+    outfit in one pass: each category is scored as an outfits x items matrix.
+    Returns one {"shoes", "accessories", "jewellery"} dict per outfit.
+    """
+    extras = [{"shoes": None, "accessories": [], "jewellery": None} for _ in outfits]
+    if not outfits:
+        return extras
+
+    occasion = context.get("occasion")
+    outfit_pack = pack_outfits(outfits)
+
+    if shoes:
+        pack = pack_extras(shoes, occasion)
+        scores = extras_score_matrix(outfit_pack, pack, neutral_bonus=0.2)
+
+        # Skip open footwear in rain
+        allowed = None
+        if context.get("weather_type") == "rainy":
+            allowed = ~pack["open"]
+
+        for extra, shoe in zip(extras, pick_best(shoes, scores, allowed)):
+            extra["shoes"] = shoe
+
+    if accessories:
+        scores = extras_score_matrix(outfit_pack, pack_extras(accessories, occasion))
+        for extra, row in zip(extras, scores):
+            # Stable, so ties keep wardrobe order like list.sort
+            order = np.argsort(-row, kind="stable")[:accessory_limit]
+            extra["accessories"] = [accessories[j] for j in order]
+
+    if jewellery and occasion in ["party", "traditional"]:
+        scores = extras_score_matrix(outfit_pack, pack_extras(jewellery, occasion))
+        for extra, item in zip(extras, pick_best(jewellery, scores)):
+            extra["jewellery"] = item
+
+    return extras
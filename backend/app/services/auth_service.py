@@ -1,4 +1,6 @@
 import os
+import threading
+import time
 import jwt
 from datetime import datetime, timedelta
 from typing import Optional
@@ -6,7 +8,9 @@ from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from dotenv import load_dotenv
-from app.config.db import users_collection, token_blocklist_collection
+from app.repositories import user_repository, token_blocklist_repository
+from app.services.cache import TTLCache
+from app.services.metrics import stage, register_collector, render_family
 
 load_dotenv()
 
@@ -17,6 +21,15 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 7 days
 pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
+# In-process auth caches (per worker)
+AUTH_CACHE_TTL = int(os.getenv("AUTH_CACHE_TTL", "60"))
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "1024"))
+BLOCKLIST_REFRESH_SECONDS = float(os.getenv("BLOCKLIST_REFRESH_SECONDS", "5"))
+
+# token -> email (skips JWT decoding), email -> user document
+token_cache = TTLCache(maxsize=AUTH_CACHE_SIZE, ttl=AUTH_CACHE_TTL)
+user_cache = TTLCache(maxsize=AUTH_CACHE_SIZE, ttl=AUTH_CACHE_TTL)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
@@ -33,34 +46,160 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def is_token_blocklisted(token: str) -> bool:
-    token_record = token_blocklist_collection.find_one({"token": token})
-    return token_record is not None
+class BlocklistMirror:
+    """
+    Local copy of token_blocklist, refreshed incrementally so that
+    checking a token is a set lookup instead of a DB read.
+    Tokens logged out on another worker are seen after at most
+    BLOCKLIST_REFRESH_SECONDS.
+    """
+
+    # Overlap between refreshes to tolerate clock skew between workers
+    SKEW = timedelta(seconds=30)
+
+    PROJECTION = {"token": 1, "blocklisted_at": 1}
+
+    def __init__(self, refresh_seconds=BLOCKLIST_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self.refreshes = 0
+        self._tokens = {}
+        self._last_seen = None
+        self._next_refresh = 0
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def _since(self):
+        return self._last_seen - self.SKEW if self._last_seen else None
+
+    def _apply(self, records):
+        for record in records:
+            blocklisted_at = record.get("blocklisted_at") or datetime.utcnow()
+            self._tokens[record["token"]] = blocklisted_at
+            if not self._last_seen or blocklisted_at > self._last_seen:
+                self._last_seen = blocklisted_at
+
+        # Drop entries whose JWT has expired anyway (mirrors the TTL index)
+        cutoff = datetime.utcnow() - timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+        self._tokens = {t: at for t, at in self._tokens.items() if at > cutoff}
+
+        self.refreshes += 1
+        self._next_refresh = time.monotonic() + self.refresh_seconds
+
+    async def refresh_async(self):
+        records = await token_blocklist_repository.find_since(self._since(), self.PROJECTION)
+        with self._lock:
+            self._apply(records)
+
+    def add(self, token: str):
+        with self._lock:
+            self._tokens[token] = datetime.utcnow()
+
+    async def contains_async(self, token: str) -> bool:
+        """
+        The refresh query goes through the async repository and only one
+        request per worker runs it
+        """
+        if time.monotonic() >= self._next_refresh and not self._refreshing:
+            self._refreshing = True
+            try:
+                await self.refresh_async()
+            finally:
+                self._refreshing = False
+        with self._lock:
+            return token in self._tokens
+
+    def stats(self):
+        return {"size": len(self._tokens), "refreshes": self.refreshes}
+
+
+blocklist_mirror = BlocklistMirror()
+
+
+async def blocklist_token(token: str, user_id: str):
+    """
+    Persist a logged-out token and drop it from the local caches
+    """
+    await token_blocklist_repository.add({
+        "token": token,
+        "user_id": user_id,
+        "blocklisted_at": datetime.utcnow()
+    })
+    blocklist_mirror.add(token)
+    token_cache.pop(token)
+
+
+def auth_cache_stats() -> dict:
+    return {
+        "tokens": token_cache.stats(),
+        "users": user_cache.stats(),
+        "blocklist": blocklist_mirror.stats()
+    }
+
+
+@register_collector
+def auth_cache_metrics() -> str:
+    """
+    auth_cache_stats() for GET /metrics
+    """
+    stats = auth_cache_stats()
+    caches = ("tokens", "users")
+    return "\n".join([
+        render_family("autostylist_auth_cache_hits_total", "Auth cache lookups answered from memory",
+                      "counter", [({"cache": name}, stats[name]["hits"]) for name in caches]),
+        render_family("autostylist_auth_cache_misses_total", "Auth cache lookups that went to MongoDB or JWT decoding",
+                      "counter", [({"cache": name}, stats[name]["misses"]) for name in caches]),
+        render_family("autostylist_auth_cache_entries", "Entries held by each auth cache",
+                      "gauge", [({"cache": name}, stats[name]["size"]) for name in caches]),
+        render_family("autostylist_token_blocklist_entries", "Logged-out tokens mirrored locally",
+                      "gauge", [({}, stats["blocklist"]["size"])]),
+        render_family("autostylist_token_blocklist_refreshes_total", "Blocklist mirror refreshes",
+                      "counter", [({}, stats["blocklist"]["refreshes"])])
+    ])
+
+
+async def get_user_by_email_async(email: str) -> Optional[dict]:
+    user = user_cache.get(email)
+    if user is None:
+        user = await user_repository.find_by_email(email)
+        if user is not None:
+            user_cache.set(email, user)
+    return user
 
 
 async def get_current_user(token: str = Depends(oauth2_scheme)) -> dict:
+    with stage("auth"):
+        return await authenticate(token)
+
+
+async def authenticate(token: str) -> dict:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    if is_token_blocklisted(token):
+    if await blocklist_mirror.contains_async(token):
          raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token has been blacklisted (user logged out)",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
+    email = token_cache.get(token)
+    if email is None:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            email = payload.get("sub")
+            if email is None:
+                raise credentials_exception
+        except jwt.PyJWTError:
             raise credentials_exception
-    except jwt.PyJWTError:
-        raise credentials_exception
-        
-    user = users_collection.find_one({"email": email})
+
+        # Never keep a token cached past its own expiry
+        expires_in = payload.get("exp", 0) - time.time()
+        token_cache.set(token, email, ttl=min(AUTH_CACHE_TTL, expires_in))
+
+    user = await get_user_by_email_async(email)
     if user is None:
         raise credentials_exception
         
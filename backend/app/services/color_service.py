@@ -1,9 +1,20 @@
+import os
 import numpy as np
 from PIL import Image
 from sklearn.cluster import KMeans
 
+# "kmeans": KMeans over every visible pixel (reference quality)
+# "fast": KMeans over a quantized color histogram, deterministic
+COLOR_EXTRACTION_MODE = os.getenv("COLOR_EXTRACTION_MODE", "kmeans")
+
+# Bits kept per channel when building the histogram (5 → 32,768 bins)
+HISTOGRAM_BITS = 5
+RANDOM_SEED = 0
+
+
+def extract_dominant_colors(image_path, k=3, mode=None):
+    mode = mode or COLOR_EXTRACTION_MODE
 
-def extract_dominant_colors(image_path, k=3):
     img = Image.open(image_path).convert("RGBA")
     data = np.array(img)
 
@@ -34,6 +45,9 @@ def extract_dominant_colors(image_path, k=3):
     # KMeans clustering
     # Reduce k if we don't have enough unique pixels
     n_clusters = min(k, len(pixels))
+
+    if mode == "fast":
+        return histogram_colors(pixels, n_clusters)
     
     kmeans = KMeans(n_clusters=n_clusters, n_init=10)
     kmeans.fit(pixels)
@@ -45,3 +59,36 @@ def extract_dominant_colors(image_path, k=3):
     sorted_colors = [colors[i] for i in counts.argsort()[::-1]]
 
     return [tuple(map(int, c)) for c in sorted_colors]
+
+
+def histogram_colors(pixels, n_clusters):
+    """
+    Fast mode: bucket pixels into a quantized color histogram, then cluster
+    the (mean color, count) of each occupied bucket with weighted KMeans.
+    Thousands of weighted points instead of every pixel, fixed seed.
+    """
+    pixels = pixels.astype(np.int64)
+    shift = 8 - HISTOGRAM_BITS
+    q = pixels >> shift
+    bins = (q[:, 0] << (2 * HISTOGRAM_BITS)) | (q[:, 1] << HISTOGRAM_BITS) | q[:, 2]
+
+    occupied, inverse, counts = np.unique(bins, return_inverse=True, return_counts=True)
+
+    # Mean real color of the pixels in each bucket
+    centers = np.stack([
+        np.bincount(inverse, weights=pixels[:, c], minlength=len(occupied))
+        for c in range(3)
+    ], axis=1) / counts[:, None]
+
+    n_clusters = min(n_clusters, len(occupied))
+
+    kmeans = KMeans(n_clusters=n_clusters, n_init=3, random_state=RANDOM_SEED)
+    kmeans.fit(centers, sample_weight=counts)
+
+    colors = kmeans.cluster_centers_
+
+    # Sort by frequency (pixel counts, not bucket counts)
+    cluster_counts = np.bincount(kmeans.labels_, weights=counts, minlength=n_clusters)
+    sorted_colors = [colors[i] for i in cluster_counts.argsort()[::-1]]
+
+    return [tuple(map(int, c)) for c in sorted_colors]
@@ -0,0 +1,313 @@
+import colorsys
+import math
+import os
+import tempfile
+import threading
+
+import numpy as np
+
+# -------------------------------------------------
+# Configuration
+# -------------------------------------------------
+
+# "rgb": Euclidean distance in normalized RGB (original behaviour)
+# "lab": CIELAB Delta E, computed exactly
+# "lut": CIELAB Delta E, looked up from the precomputed bin table
+COLOR_METRIC = os.getenv("COLOR_METRIC", "rgb")
+
+# Relative paths are resolved against the backend directory, not the cwd
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+HARMONY_LUT_PATH = os.path.join(BACKEND_DIR, os.getenv("HARMONY_LUT_PATH", "app/data/harmony_lut.npy"))
+
+# Delta E at which two colors stop matching at all
+DELTA_E_SCALE = 100.0
+
+# Chroma below which a color counts as neutral in CIELAB
+NEUTRAL_CHROMA = 12.0
+
+# Bits kept per RGB channel for the lookup table: 4 -> 16^3 = 4096 bins
+LUT_BITS = 4
+LUT_LEVELS = 1 << LUT_BITS
+LUT_BINS = LUT_LEVELS ** 3
+
+# D65 reference white
+WHITE_POINT = (0.95047, 1.0, 1.08883)
+
+SRGB_TO_XYZ = (
+    (0.4124564, 0.3575761, 0.1804375),
+    (0.2126729, 0.7151522, 0.0721750),
+    (0.0193339, 0.1191920, 0.9503041)
+)
+
+# CIELAB f(t) breakpoint
+LAB_EPSILON = (6 / 29) ** 3
+
+
+# -------------------------------------------------
+# RGB Helpers
+# -------------------------------------------------
+
+def normalize_rgb(rgb):
+    """
+    Convert RGB [0-255] to normalized [0-1]
+    Safe fallback if data missing
+    """
+    if not rgb or len(rgb) != 3:
+        return [0, 0, 0]
+    return [x / 255 for x in rgb]
+
+
+def euclidean_distance(c1, c2):
+    return math.sqrt(sum((a - b) ** 2 for a, b in zip(c1, c2)))
+
+
+def pairwise_distance(a, b):
+    """
+    Euclidean distance between every row of a and every row of b.
+    Summed in the same order as euclidean_distance so results are bit-identical.
+    """
+    diff = a[:, None, :] - b[None, :, :]
+    return np.sqrt(diff[..., 0] ** 2 + diff[..., 1] ** 2 + diff[..., 2] ** 2)
+
+
+# -------------------------------------------------
+# CIELAB
+# -------------------------------------------------
+
+def srgb_to_linear(c):
+    return ((c + 0.055) / 1.055) ** 2.4 if c > 0.04045 else c / 12.92
+
+
+def lab_f(t):
+    return t ** (1 / 3) if t > LAB_EPSILON else t / (3 * (6 / 29) ** 2) + 4 / 29
+
+
+def rgb_to_lab(rgb):
+    """
+    sRGB [0-255] -> CIELAB (D65) for a single color
+    """
+    linear = [srgb_to_linear(x / 255) for x in rgb]
+    fx, fy, fz = (
+        lab_f(sum(m * c for m, c in zip(row, linear)) / white)
+        for row, white in zip(SRGB_TO_XYZ, WHITE_POINT)
+    )
+    return [116 * fy - 16, 500 * (fx - fy), 200 * (fy - fz)]
+
+
+def rgb_to_lab_array(rgb):
+    """
+    rgb_to_lab for an (n, 3) array
+    """
+    c = np.asarray(rgb, dtype=float) / 255
+    linear = np.where(c > 0.04045, ((c + 0.055) / 1.055) ** 2.4, c / 12.92)
+    xyz = linear @ np.array(SRGB_TO_XYZ).T / np.array(WHITE_POINT)
+
+    f = np.where(xyz > LAB_EPSILON, np.cbrt(xyz), xyz / (3 * (6 / 29) ** 2) + 4 / 29)
+    fx, fy, fz = f[:, 0], f[:, 1], f[:, 2]
+
+    return np.stack([116 * fy - 16, 500 * (fx - fy), 200 * (fy - fz)], axis=-1)
+
+
+def is_neutral(rgb, metric=None):
+    """
+    Detect neutral colors (black, white, grey).
+    In CIELAB this is low chroma, which also catches beiges and
+    near-greys that the RGB channel check misses.
+    """
+    if not rgb or len(rgb) != 3:
+        return True
+
+    if (metric or COLOR_METRIC) == "rgb":
+        r, g, b = rgb
+        return abs(r - g) < 15 and abs(g - b) < 15
+
+    _, a, b = rgb_to_lab(rgb)
+    return math.hypot(a, b) < NEUTRAL_CHROMA
+
+
+# Upper hue bound (degrees) of each named color family
+COLOR_FAMILIES = [
+    (15, "red"),
+    (45, "orange"),
+    (70, "yellow"),
+    (165, "green"),
+    (200, "cyan"),
+    (260, "blue"),
+    (290, "purple"),
+    (335, "pink"),
+    (360, "red")
+]
+
+
+def color_family(rgb):
+    """
+    Coarse color name for summaries (wardrobe stats).
+    Always uses the RGB neutral check so names do not shift with COLOR_METRIC.
+    """
+    if not rgb or len(rgb) != 3:
+        return "unknown"
+    if is_neutral(rgb, "rgb"):
+        return "neutral"
+
+    hue, _, _ = colorsys.rgb_to_hsv(*(x / 255 for x in rgb))
+    degrees = hue * 360
+    for limit, name in COLOR_FAMILIES:
+        if degrees < limit:
+            return name
+    return "red"
+
+
+def color_bin(rgb):
+    """
+    Lookup table bin of an RGB [0-255] color
+    """
+    if not rgb or len(rgb) != 3:
+        return 0
+    shift = 8 - LUT_BITS
+    r, g, b = (int(x) >> shift for x in rgb)
+    return (r * LUT_LEVELS + g) * LUT_LEVELS + b
+
+
+def color_features(rgb):
+    """
+    Everything the harmony functions need about one color,
+    computed once per item
+    """
+    return {
+        "rgb": normalize_rgb(rgb),
+        "lab": rgb_to_lab(rgb) if rgb and len(rgb) == 3 else [0.0, 0.0, 0.0],
+        "bin": color_bin(rgb)
+    }
+
+
+def pack_colors(colors):
+    """
+    List of color_features dicts -> arrays for harmony_matrix
+    """
+    return {
+        "rgb": np.array([c["rgb"] for c in colors], dtype=float).reshape(-1, 3),
+        "lab": np.array([c["lab"] for c in colors], dtype=float).reshape(-1, 3),
+        "bin": np.array([c["bin"] for c in colors], dtype=np.intp)
+    }
+
+
+# -------------------------------------------------
+# Harmony Lookup Table
+# -------------------------------------------------
+
+_harmony_lut = None
+_lut_lock = threading.Lock()
+
+
+def bin_centers():
+    """
+    RGB [0-255] center of every lookup table bin
+    """
+    levels = (np.arange(LUT_LEVELS) << (8 - LUT_BITS)) + (1 << (7 - LUT_BITS))
+    r, g, b = np.meshgrid(levels, levels, levels, indexing="ij")
+    return np.stack([r.ravel(), g.ravel(), b.ravel()], axis=-1)
+
+
+def build_harmony_lut(chunk=256):
+    """
+    Bin x bin harmony scores, quantized to uint8 (score * 255)
+    """
+    lab = rgb_to_lab_array(bin_centers())
+    lut = np.empty((LUT_BINS, LUT_BINS), dtype=np.uint8)
+
+    for start in range(0, LUT_BINS, chunk):
+        delta_e = pairwise_distance(lab[start:start + chunk], lab)
+        score = np.maximum(0.0, 1 - delta_e / DELTA_E_SCALE)
+        lut[start:start + chunk] = np.rint(score * 255)
+
+    return lut
+
+
+def save_harmony_lut(path=None):
+    """
+    Written to a temporary file next to path and renamed into place, so
+    other workers never map a partially written table
+    """
+    path = path or HARMONY_LUT_PATH
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    lut = build_harmony_lut()
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".harmony_lut-", suffix=".npy")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, lut)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return lut
+
+
+def get_harmony_lut():
+    """
+    Memory-mapped from disk (built and saved on first use), so worker
+    startup only maps the file instead of recomputing 16M scores
+    """
+    global _harmony_lut
+    if _harmony_lut is None:
+        with _lut_lock:
+            if _harmony_lut is None:
+                if not os.path.exists(HARMONY_LUT_PATH):
+                    try:
+                        save_harmony_lut()
+                    except OSError:
+                        # Read-only deploy: keep the table in memory only
+                        _harmony_lut = build_harmony_lut()
+                        return _harmony_lut
+                _harmony_lut = np.load(HARMONY_LUT_PATH, mmap_mode="r")
+    return _harmony_lut
+
+
+# -------------------------------------------------
+# Harmony Scoring
+# -------------------------------------------------
+
+def harmony(c1, c2, metric=None):
+    """
+    0..1 match between two color_features dicts
+    """
+    metric = metric or COLOR_METRIC
+
+    if metric == "lut":
+        # Plain float: round() on NumPy scalars rounds differently
+        return float(get_harmony_lut()[c1["bin"], c2["bin"]]) / 255
+    if metric == "lab":
+        return max(0.0, 1 - euclidean_distance(c1["lab"], c2["lab"]) / DELTA_E_SCALE)
+    return max(0.0, 1 - euclidean_distance(c1["rgb"], c2["rgb"]))
+
+
+def rgb_harmony(rgb1, rgb2, metric=None):
+    """
+    harmony between two raw RGB [0-255] colors, converting only
+    what the metric needs
+    """
+    metric = metric or COLOR_METRIC
+
+    if metric == "lut":
+        return float(get_harmony_lut()[color_bin(rgb1), color_bin(rgb2)]) / 255
+    if metric == "lab":
+        lab1 = rgb_to_lab(rgb1) if rgb1 and len(rgb1) == 3 else [0.0, 0.0, 0.0]
+        lab2 = rgb_to_lab(rgb2) if rgb2 and len(rgb2) == 3 else [0.0, 0.0, 0.0]
+        return max(0.0, 1 - euclidean_distance(lab1, lab2) / DELTA_E_SCALE)
+    return max(0.0, 1 - euclidean_distance(normalize_rgb(rgb1), normalize_rgb(rgb2)))
+
+
+def harmony_matrix(a, b, metric=None):
+    """
+    harmony for every row of a x every row of b (pack_colors arrays);
+    with the lookup table this is a single fancy index
+    """
+    metric = metric or COLOR_METRIC
+
+    if metric == "lut":
+        return get_harmony_lut()[a["bin"][:, None], b["bin"][None, :]] / 255
+    if metric == "lab":
+        return np.maximum(0.0, 1 - pairwise_distance(a["lab"], b["lab"]) / DELTA_E_SCALE)
+    return np.maximum(0.0, 1 - pairwise_distance(a["rgb"], b["rgb"]))
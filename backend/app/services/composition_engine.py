@@ -0,0 +1,241 @@
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+
+from app.services.decision_engine import pack_items, score_matrix
+from app.services.accessories_engine import (
+    pack_extras,
+    pack_outfits,
+    extras_score_matrix
+)
+
+# -------------------------------------------------
+# Configuration
+# -------------------------------------------------
+
+# "greedy": rank top/bottom pairs, then pick extras for each
+# "joint": search full outfits here (opt-in)
+COMPOSITION_MODE = os.getenv("COMPOSITION_MODE", "greedy")
+
+# Best top/bottom pairs considered for full composition (latency cap)
+COMPOSITION_CANDIDATES = int(os.getenv("COMPOSITION_CANDIDATES", "60"))
+
+# Partial outfits kept after each search stage
+COMPOSITION_BEAM_WIDTH = int(os.getenv("COMPOSITION_BEAM_WIDTH", "12"))
+
+# Share of the ranking that comes from shoes / accessories / jewellery
+COMPOSITION_EXTRAS_WEIGHT = float(os.getenv("COMPOSITION_EXTRAS_WEIGHT", "0.2"))
+
+# Once spent, remaining stages are completed greedily
+COMPOSITION_BUDGET_MS = float(os.getenv("COMPOSITION_BUDGET_MS", "50"))
+
+# Color match (1.0) + neutral shoe bonus (0.2) + occasion bonus (0.5);
+# extras scores are scaled into 0..1 by this, preference only breaks ties
+EXTRA_SCORE_CAP = 1.7
+
+# Items tried per partial outfit when expanding an extras stage
+BRANCH_FACTOR = 2
+
+JEWELLERY_OCCASIONS = ["party", "traditional"]
+
+
+# -------------------------------------------------
+# Search Stages
+# -------------------------------------------------
+
+def build_stages(top_pack, shoes, accessories, jewellery, context):
+    """
+    One (name, items, fit matrix) per extras category, where fit is
+    a tops x items matrix of 0..1 scores (-inf = not allowed)
+    """
+    occasion = context.get("occasion")
+    stages = []
+
+    if shoes:
+        pack = pack_extras(shoes, occasion)
+        fit = extras_score_matrix(top_pack, pack, neutral_bonus=0.2)
+        # Skip open footwear in rain
+        if context.get("weather_type") == "rainy":
+            fit[:, pack["open"]] = -np.inf
+        if not pack["open"].all() or context.get("weather_type") != "rainy":
+            stages.append(("shoes", shoes, fit))
+
+    if accessories:
+        pack = pack_extras(accessories, occasion)
+        stages.append(("accessories", accessories, extras_score_matrix(top_pack, pack)))
+
+    if jewellery and occasion in JEWELLERY_OCCASIONS:
+        pack = pack_extras(jewellery, occasion)
+        stages.append(("jewellery", jewellery, extras_score_matrix(top_pack, pack)))
+
+    return [
+        (name, items, np.where(
+            np.isfinite(fit), np.clip(fit, 0.0, EXTRA_SCORE_CAP) / EXTRA_SCORE_CAP, -np.inf
+        ))
+        for name, items, fit in stages
+    ]
+
+
+def diversify(states, limit):
+    """
+    Best states with distinct tops first; tops are only reused
+    when there are not enough distinct ones to fill the limit
+    """
+    chosen = []
+    seen_tops = set()
+    for state in states:
+        if state[1] not in seen_tops:
+            chosen.append(state)
+            seen_tops.add(state[1])
+        if len(chosen) == limit:
+            return chosen
+
+    for state in states:
+        if len(chosen) == limit:
+            break
+        if state not in chosen:
+            chosen.append(state)
+
+    # Keep best / medium / average in score order
+    chosen.sort(key=lambda state: -state[0])
+    return chosen
+
+
+# -------------------------------------------------
+# Composition Engine
+# -------------------------------------------------
+
+def compose_outfits(tops, bottoms, shoes, accessories, jewellery, context, limit=3,
+                    candidates=None, beam_width=None, budget_ms=None):
+    """
+    Searches over full outfits (top + bottom + extras) instead of
+    bolting extras onto the best pairs afterwards.
+
+    - Pairs are scored with the decision engine; only the best
+      `candidates` survive, and pairs that cannot reach the beam even
+      with perfect extras are dropped (score bound).
+    - Extras are added one category per stage with beam search; states
+      are ranked by their optimistic bound (score so far + the best
+      remaining extras for that top).
+    - Results are diverse: no top is reused unless necessary.
+
+    Each outfit's "score" is the composite the results are ordered by
+    (top/bottom score weighted with the extras fit, same rank bias as
+    rank_outfits), so scores always decrease down the list. The plain
+    top/bottom score is kept in "pair_score".
+    """
+    if not tops or not bottoms or limit <= 0:
+        return []
+
+    candidates = candidates or COMPOSITION_CANDIDATES
+    beam_width = max(beam_width or COMPOSITION_BEAM_WIDTH, limit)
+    budget_ms = COMPOSITION_BUDGET_MS if budget_ms is None else budget_ms
+    deadline = time.perf_counter() + budget_ms / 1000
+
+    now = datetime.utcnow()
+    top_pack = pack_items(tops, context["occasion"], now)
+    bottom_pack = pack_items(bottoms, context["occasion"], now)
+    pair_scores = score_matrix(top_pack, bottom_pack, context["weather_type"]).ravel()
+
+    # --- Stage 0: candidate pairs ---
+    n_bottoms = len(bottoms)
+    cap = min(candidates, pair_scores.size)
+    pair_ids = np.argpartition(-pair_scores, cap - 1)[:cap]
+    # Best first, ties keep combination order
+    pair_ids = pair_ids[np.lexsort((pair_ids, -pair_scores[pair_ids]))]
+
+    weight = COMPOSITION_EXTRAS_WEIGHT
+    base = (1 - weight) * pair_scores[pair_ids]
+
+    # Bound: extras add between 0 and `weight`. Once `limit` distinct tops
+    # have a pair this good, any pair below it minus `weight` can never
+    # make the final (diverse) selection.
+    _, first = np.unique(pair_ids // n_bottoms, return_index=True)
+    if first.size >= limit:
+        threshold = np.sort(base[first])[::-1][limit - 1]
+        keep = base + weight >= threshold
+        pair_ids, base = pair_ids[keep], base[keep]
+
+    # Extras are matched against the top, so only score the tops in play
+    candidate_tops = np.unique(pair_ids // n_bottoms)
+    top_rows = {int(t): row for row, t in enumerate(candidate_tops)}
+    stages = build_stages(
+        pack_outfits([{"top": tops[t]} for t in candidate_tops]),
+        shoes, accessories, jewellery, context
+    )
+    if not stages:
+        # Nothing to add: the composite is the pair score itself
+        base = pair_scores[pair_ids]
+    share = weight / len(stages) if stages else 0.0
+
+    # Best achievable fit per top for every remaining stage suffix
+    remaining = np.zeros((len(stages) + 1, len(candidate_tops)))
+    for s in range(len(stages) - 1, -1, -1):
+        best_fit = stages[s][2].max(axis=1)
+        remaining[s] = remaining[s + 1] + np.where(np.isfinite(best_fit), best_fit, 0.0)
+
+    def bound(state, stage):
+        return state[0] + share * remaining[stage][top_rows[state[1]]]
+
+    per_top = max(1, beam_width // limit)
+
+    def select_beam(states, stage):
+        """
+        Best states by bound, at most per_top per top so the beam stays diverse
+        """
+        states.sort(key=lambda state: -bound(state, stage))
+        kept = []
+        per_top_count = {}
+        for state in states:
+            count = per_top_count.get(state[1], 0)
+            if count < per_top:
+                kept.append(state)
+                per_top_count[state[1]] = count + 1
+            if len(kept) == beam_width:
+                break
+        return kept
+
+    # State: (score so far, top index, bottom index, {stage: item index})
+    beam = select_beam([
+        (float(score), int(idx // n_bottoms), int(idx % n_bottoms), {})
+        for score, idx in zip(base, pair_ids)
+    ], 0)
+
+    for s, (name, items, fit) in enumerate(stages):
+        # Out of time: finish every kept state with its best remaining items
+        branch = 1 if time.perf_counter() > deadline else BRANCH_FACTOR
+        expanded = []
+        for score, ti, bi, picks in beam:
+            row = fit[top_rows[ti]]
+            for j in np.argsort(-row, kind="stable")[:branch]:
+                if not np.isfinite(row[j]):
+                    break
+                expanded.append((score + share * row[j], ti, bi, {**picks, name: int(j)}))
+        beam = select_beam(expanded, s + 1)
+
+    beam.sort(key=lambda state: -state[0])
+
+    outfits = []
+    for i, (score, ti, bi, picks) in enumerate(diversify(beam, limit)):
+        extras = {"shoes": None, "accessories": [], "jewellery": None}
+        for name, items, _ in stages:
+            if name not in picks:
+                continue
+            item = items[picks[name]]
+            if name == "accessories":
+                extras["accessories"] = [item]
+            else:
+                extras[name] = item
+
+        outfits.append({
+            "top": tops[ti],
+            "bottom": bottoms[bi],
+            # Same tiny rank bias as the decision engine
+            "score": round(round(score, 3) - (i * 0.001), 3),
+            "pair_score": round(float(pair_scores[ti * n_bottoms + bi]), 3),
+            "extras": extras
+        })
+
+    return outfits
@@ -1,11 +1,44 @@
 import requests
 import os
+import re
+import threading
+import time
 from dotenv import load_dotenv
 
+from app.services.cache import TTLCache
+
 load_dotenv()
 
 API_KEY = os.getenv("WEATHER_API_KEY")
-CITY = "Mumbai"
+CITY = os.getenv("WEATHER_CITY", "Mumbai")
+
+# Seconds before a cached reading is refreshed, and how long an old reading
+# may still be served while a refresh runs or the API is down
+WEATHER_CACHE_TTL = int(os.getenv("WEATHER_CACHE_TTL", "600"))
+WEATHER_STALE_TTL = int(os.getenv("WEATHER_STALE_TTL", "3600"))
+WEATHER_TIMEOUT = float(os.getenv("WEATHER_TIMEOUT", "2"))
+# Back-off after a failed fetch before the API is tried again
+WEATHER_RETRY_AFTER = int(os.getenv("WEATHER_RETRY_AFTER", "60"))
+# Cities kept in the cache (least recently used ones are dropped)
+WEATHER_CACHE_SIZE = int(os.getenv("WEATHER_CACHE_SIZE", "256"))
+
+# City names: letters first, then letters / digits / spaces / . , ' -
+# ("St. John's", "London,uk")
+MAX_CITY_LENGTH = 64
+CITY_PATTERN = re.compile(r"[^\W\d_][\w .,'-]*")
+
+
+def normalize_city(city):
+    """
+    Collapses whitespace; returns None for anything that is not a
+    plausible city name, which is never cached or sent to the API
+    """
+    if not isinstance(city, str):
+        return None
+    city = " ".join(city.split())
+    if len(city) > MAX_CITY_LENGTH or not CITY_PATTERN.fullmatch(city):
+        return None
+    return city
 
 
 def normalize_weather(condition):
@@ -23,27 +56,176 @@ def normalize_weather(condition):
         return "normal"
 
 
-def get_weather():
-    try:
-        url = f"https://api.openweathermap.org/data/2.5/weather?q={CITY}&appid={API_KEY}&units=metric"
-        response = requests.get(url)
+def fallback_weather(city):
+    # Fallback if API fails
+    return {
+        "city": city,
+        "temperature": 30,
+        "weather": "Clear",
+        "weather_type": "sunny"
+    }
+
+
+# -------------------------------------------------
+# Providers
+# -------------------------------------------------
+
+class OpenWeatherMapProvider:
+    """
+    Current weather from OpenWeatherMap. Raises on any failure.
+    """
+
+    URL = "https://api.openweathermap.org/data/2.5/weather"
+
+    def __init__(self, api_key=API_KEY, timeout=WEATHER_TIMEOUT):
+        self.api_key = api_key
+        self.timeout = timeout
+
+    def fetch(self, city):
+        response = requests.get(
+            self.URL,
+            params={"q": city, "appid": self.api_key, "units": "metric"},
+            timeout=self.timeout
+        )
+        response.raise_for_status()
         data = response.json()
 
-        temperature = data["main"]["temp"]
         weather_main = data["weather"][0]["main"]
 
         return {
-            "city": CITY,
-            "temperature": temperature,
+            "city": city,
+            "temperature": data["main"]["temp"],
             "weather": weather_main,
             "weather_type": normalize_weather(weather_main)
         }
 
-    except Exception:
-        # Fallback if API fails
-        return {
-            "city": CITY,
-            "temperature": 30,
-            "weather": "Clear",
-            "weather_type": "sunny"
-        }
+
+class StaticWeatherProvider:
+    """
+    Fixed weather for every city (offline development, tests, benchmarks)
+    """
+
+    def __init__(self, weather=None):
+        self.weather = weather or fallback_weather(CITY)
+
+    def fetch(self, city):
+        return {**self.weather, "city": city}
+
+
+class CachedWeatherProvider:
+    """
+    Per-city TTL cache in front of a provider, bounded to the
+    WEATHER_CACHE_SIZE most recently used cities.
+
+    - Fresh readings are returned directly
+    - Stale readings are returned immediately and refreshed in the background
+    - Concurrent callers for the same city share one in-flight fetch
+    - If nothing usable is cached and the fetch fails, fallback_weather is used
+    - After a failure the provider is left alone for WEATHER_RETRY_AFTER seconds
+    """
+
+    def __init__(self, provider, ttl=WEATHER_CACHE_TTL, stale_ttl=WEATHER_STALE_TTL, maxsize=WEATHER_CACHE_SIZE):
+        self.provider = provider
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        # key -> (reading, fetched_at); unusable once older than stale_ttl
+        self._entries = TTLCache(maxsize=maxsize, ttl=stale_ttl)
+        self._inflight = {}
+        # Keys whose last fetch failed, until they may be tried again
+        self._failed = TTLCache(maxsize=maxsize, ttl=WEATHER_RETRY_AFTER)
+        self._lock = threading.Lock()
+
+    def get(self, city):
+        city = normalize_city(city)
+        if city is None:
+            return fallback_weather(CITY)
+
+        key = city.lower()
+        entry = self._entries.get(key)
+
+        if entry:
+            value, fetched_at = entry
+            age = time.monotonic() - fetched_at
+            if age < self.ttl:
+                return value
+            if age < self.stale_ttl:
+                # Stale-while-revalidate
+                if not self._backing_off(key):
+                    self._refresh(key, city)
+                return value
+
+        value = None if self._backing_off(key) else self._fetch(key, city)
+        if value is not None:
+            return value
+        return entry[0] if entry else fallback_weather(city)
+
+    def _backing_off(self, key):
+        return self._failed.get(key) is not None
+
+    def _refresh(self, key, city):
+        """
+        Background fetch, unless one for the city is already in flight
+        """
+        with self._lock:
+            if key in self._inflight:
+                return
+            event = self._inflight[key] = threading.Event()
+        threading.Thread(target=self._run, args=(key, city, event), daemon=True).start()
+
+    def _fetch(self, key, city):
+        """
+        Fetch once per city at a time; other callers wait for the same result.
+        Returns None on failure.
+        """
+        with self._lock:
+            event = self._inflight.get(key)
+            leader = event is None
+            if leader:
+                event = self._inflight[key] = threading.Event()
+
+        if not leader:
+            event.wait(WEATHER_TIMEOUT + 1)
+            entry = self._entries.get(key)
+            return entry[0] if entry else None
+
+        return self._run(key, city, event)
+
+    def _run(self, key, city, event):
+        """
+        Fetches for the caller that registered event in _inflight
+        """
+        try:
+            value = self.provider.fetch(city)
+            self._entries.set(key, (value, time.monotonic()))
+            return value
+        except Exception:
+            self._failed.set(key, True)
+            return None
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            event.set()
+
+    def clear(self):
+        self._entries.clear()
+
+
+def default_provider():
+    if not API_KEY:
+        return StaticWeatherProvider()
+    return OpenWeatherMapProvider()
+
+
+weather_provider = CachedWeatherProvider(default_provider())
+
+
+def set_weather_provider(provider):
+    """
+    Swap the upstream provider (e.g. a fake in tests); the cache is reset
+    """
+    global weather_provider
+    weather_provider = CachedWeatherProvider(provider)
+
+
+def get_weather(city=None):
+    return weather_provider.get(city or CITY)
@@ -1,34 +1,19 @@
-import math
+import heapq
+import os
 from itertools import product
 from datetime import datetime
 
+import numpy as np
 
-# -------------------------------------------------
-# Utility Functions
-# -------------------------------------------------
-
-def normalize_rgb(rgb):
-    """
-    Convert RGB [0-255] to normalized [0-1]
-    Safe fallback if data missing
-    """
-    if not rgb or len(rgb) != 3:
-        return [0, 0, 0]
-    return [x / 255 for x in rgb]
-
-
-def euclidean_distance(c1, c2):
-    return math.sqrt(sum((a - b) ** 2 for a, b in zip(c1, c2)))
-
-
-def is_neutral(rgb):
-    """
-    Detect neutral colors (black, white, grey)
-    """
-    if not rgb or len(rgb) != 3:
-        return True
-    r, g, b = rgb
-    return abs(r - g) < 15 and abs(g - b) < 15
+from app.services.color_space import (
+    COLOR_METRIC,
+    is_neutral,
+    color_features,
+    pack_colors,
+    harmony,
+    harmony_matrix,
+    rgb_harmony
+)
 
 
 # -------------------------------------------------
@@ -40,14 +25,10 @@ def dominant_color_score(top, bottom):
     Score based on dominant color harmony
     Neutral colors match everything
     """
-    c1 = normalize_rgb(top.get("dominant_color"))
-    c2 = normalize_rgb(bottom.get("dominant_color"))
-
     if is_neutral(top.get("dominant_color")) or is_neutral(bottom.get("dominant_color")):
         return 1.0
 
-    dist = euclidean_distance(c1, c2)
-    return max(0.0, 1 - dist)
+    return rgb_harmony(top.get("dominant_color"), bottom.get("dominant_color"))
 
 
 def accent_color_score(top, bottom):
@@ -60,18 +41,10 @@ def accent_color_score(top, bottom):
     scores = []
 
     if len(top_colors) >= 2:
-        score = 1 - euclidean_distance(
-            normalize_rgb(top_colors[1]),
-            normalize_rgb(bottom.get("dominant_color"))
-        )
-        scores.append(max(0, score))
+        scores.append(rgb_harmony(top_colors[1], bottom.get("dominant_color")))
 
     if len(bottom_colors) >= 2:
-        score = 1 - euclidean_distance(
-            normalize_rgb(bottom_colors[1]),
-            normalize_rgb(top.get("dominant_color"))
-        )
-        scores.append(max(0, score))
+        scores.append(rgb_harmony(bottom_colors[1], top.get("dominant_color")))
 
     return max(scores) if scores else 0.0
 
@@ -80,14 +53,16 @@ def accent_color_score(top, bottom):
 # Context Scoring
 # -------------------------------------------------
 
+OCCASION_STYLES = {
+    "casual": ["casual"],
+    "office": ["formal"],
+    "party": ["party"],
+    "traditional": ["traditional"]
+}
+
+
 def occasion_score(item, occasion):
-    style_map = {
-        "casual": ["casual"],
-        "office": ["formal"],
-        "party": ["party"],
-        "traditional": ["traditional"]
-    }
-    return 1.0 if item.get("style") in style_map.get(occasion, []) else 0.4
+    return 1.0 if item.get("style") in OCCASION_STYLES.get(occasion, []) else 0.4
 
 
 def weather_score(weather_type):
@@ -101,11 +76,59 @@ def weather_score(weather_type):
     return 0.8
 
 
+# -------------------------------------------------
+# Precomputed Item Features
+# -------------------------------------------------
+
+# Bump when the feature layout or any of the functions above change,
+# so stale blocks are recomputed instead of trusted
+FEATURE_VERSION = 2
+
+
+def compute_item_features(item):
+    """
+    Per-item values that never change between requests.
+    Stored on wardrobe documents at upload time.
+    """
+    dominant = item.get("dominant_color")
+    colors = item.get("colors") or []
+
+    return {
+        "version": FEATURE_VERSION,
+        # Neutral detection depends on the color metric
+        "metric": COLOR_METRIC,
+        # rgb / lab / bin of the dominant color
+        **color_features(dominant),
+        "neutral": is_neutral(dominant),
+        "has_color": bool(dominant),
+        "accent": color_features(colors[1]) if len(colors) >= 2 else None,
+        "occasion": {
+            occasion: occasion_score(item, occasion)
+            for occasion in OCCASION_STYLES
+        }
+    }
+
+
+def get_item_features(item):
+    """
+    Stored feature block if it is current, otherwise computed on the fly
+    (legacy documents uploaded before features existed)
+    """
+    features = item.get("features")
+    if (
+        features
+        and features.get("version") == FEATURE_VERSION
+        and features.get("metric") == COLOR_METRIC
+    ):
+        return features
+    return compute_item_features(item)
+
+
 # -------------------------------------------------
 # Learning / Preference Scoring
 # -------------------------------------------------
 
-def preference_score(item):
+def preference_score(item, now=None):
     """
     Combines:
     - User like/dislike history
@@ -127,7 +150,7 @@ def preference_score(item):
     recency_penalty = 0
     last_used = item.get("last_used")
     if last_used:
-        days = (datetime.utcnow() - last_used).days
+        days = ((now or datetime.utcnow()) - last_used).days
         if days < 2:
             recency_penalty = 0.2
 
@@ -190,3 +213,240 @@ def generate_ranked_outfits(tops, bottoms, context, limit=3):
 
     return scored_outfits[:limit]
 
+
+# -------------------------------------------------
+# VECTORIZED DECISION ENGINE
+# -------------------------------------------------
+
+# Placeholder for items without an accent color (masked out by has_accent)
+NO_COLOR = color_features(None)
+
+
+def pack_items(items, occasion, now=None):
+    """
+    Packs per-item values into NumPy arrays once so that
+    pairwise scores can be computed with broadcasting
+    """
+    now = now or datetime.utcnow()
+    n = len(items)
+
+    dominant = []
+    neutral = np.zeros(n, dtype=bool)
+    accent = []
+    has_accent = np.zeros(n, dtype=bool)
+    occasion_scores = np.zeros(n)
+    preferences = np.zeros(n)
+
+    for i, item in enumerate(items):
+        features = get_item_features(item)
+        dominant.append(features)
+        neutral[i] = features["neutral"]
+
+        if features["accent"] is not None:
+            accent.append(features["accent"])
+            has_accent[i] = True
+        else:
+            accent.append(NO_COLOR)
+
+        occasion_scores[i] = features["occasion"].get(occasion, 0.4)
+        preferences[i] = preference_score(item, now)
+
+    return {
+        "dominant": pack_colors(dominant),
+        "neutral": neutral,
+        "accent": pack_colors(accent),
+        "has_accent": has_accent,
+        "occasion": occasion_scores,
+        "preference": preferences
+    }
+
+
+def score_matrix(top_pack, bottom_pack, weather_type):
+    """
+    Final weighted score for every top x bottom pair
+    """
+    # --- Dominant color harmony ---
+    dom_score = harmony_matrix(top_pack["dominant"], bottom_pack["dominant"])
+    dom_score[top_pack["neutral"], :] = 1.0
+    dom_score[:, bottom_pack["neutral"]] = 1.0
+
+    # --- Accent colors (only for multi-color items) ---
+    top_accent = harmony_matrix(top_pack["accent"], bottom_pack["dominant"])
+    bottom_accent = harmony_matrix(top_pack["dominant"], bottom_pack["accent"])
+    top_accent[~top_pack["has_accent"], :] = 0.0
+    bottom_accent[:, ~bottom_pack["has_accent"]] = 0.0
+    acc_score = np.maximum(top_accent, bottom_accent)
+
+    color_score = (0.7 * dom_score) + (0.3 * acc_score)
+
+    occ_score = (top_pack["occasion"][:, None] + bottom_pack["occasion"][None, :]) / 2
+    pref_score = (top_pack["preference"][:, None] + bottom_pack["preference"][None, :]) / 2
+
+    return (
+        0.30 * color_score +
+        0.20 * occ_score +
+        0.15 * weather_score(weather_type) +
+        0.35 * pref_score
+    )
+
+
+def generate_ranked_outfits_vectorized(tops, bottoms, context, limit=3):
+    """
+    Same ranking as generate_ranked_outfits, but scores the whole
+    top x bottom matrix at once and only sorts the best candidates
+    """
+    if not tops or not bottoms or limit <= 0:
+        return []
+
+    now = datetime.utcnow()
+    top_pack = pack_items(tops, context["occasion"], now)
+    bottom_pack = pack_items(bottoms, context["occasion"], now)
+
+    scores = score_matrix(top_pack, bottom_pack, context["weather_type"]).ravel()
+
+    # Anything more than 0.001 below the limit-th best can never round
+    # above it, so only this small candidate set needs exact ordering
+    if limit < scores.size:
+        kth = scores[np.argpartition(scores, -limit)[-limit]]
+        candidates = np.flatnonzero(scores >= kth - 0.0011)
+    else:
+        candidates = np.arange(scores.size)
+
+    # Sort by rounded score, ties keep combination order (stable sort)
+    ranked = sorted(
+        ((round(float(scores[idx]), 3), int(idx)) for idx in candidates),
+        key=lambda x: -x[0]
+    )
+
+    n_bottoms = len(bottoms)
+    outfits = []
+    for i, (score, idx) in enumerate(ranked[:limit]):
+        outfits.append({
+            "top": tops[idx // n_bottoms],
+            "bottom": bottoms[idx % n_bottoms],
+            # Same tiny rank bias as the exhaustive engine
+            "score": round(score - (i * 0.001), 3)
+        })
+
+    return outfits
+
+
+# -------------------------------------------------
+# STREAMING TOP-K ENGINE
+# -------------------------------------------------
+
+def pair_color_score(top_features, bottom_features):
+    """
+    0.7 * dominant_color_score + 0.3 * accent_color_score on item features
+    """
+    if top_features["neutral"] or bottom_features["neutral"]:
+        dom_score = 1.0
+    else:
+        dom_score = harmony(top_features, bottom_features)
+
+    scores = []
+    if top_features["accent"] is not None:
+        scores.append(harmony(top_features["accent"], bottom_features))
+    if bottom_features["accent"] is not None:
+        scores.append(harmony(bottom_features["accent"], top_features))
+    acc_score = max(scores) if scores else 0.0
+
+    return (0.7 * dom_score) + (0.3 * acc_score)
+
+
+def generate_ranked_outfits_streaming(tops, bottoms, context, limit=3):
+    """
+    Same ranking as generate_ranked_outfits, keeping only a heap of the best
+    `limit` candidates (O(limit) memory instead of one dict per pair).
+
+    Color harmony is at most 1, so each pair has an upper bound from its
+    occasion and preference scores alone. Tops and bottoms are visited in
+    bound order and the search stops as soon as no remaining pair can beat
+    the current limit-th best.
+    """
+    if not tops or not bottoms or limit <= 0:
+        return []
+
+    now = datetime.utcnow()
+    occasion = context["occasion"]
+    weather = weather_score(context["weather_type"])
+
+    def prepare(items):
+        prepared = []
+        for index, item in enumerate(items):
+            features = get_item_features(item)
+            occ = features["occasion"].get(occasion, 0.4)
+            pref = preference_score(item, now)
+            # This item's share of the pair's upper bound
+            bound = 0.10 * occ + 0.175 * pref
+            prepared.append((bound, index, features, occ, pref))
+        prepared.sort(key=lambda x: -x[0])
+        return prepared
+
+    top_list = prepare(tops)
+    bottom_list = prepare(bottoms)
+
+    # Colour term at its maximum + weather; 1e-9 absorbs float reassociation
+    base_bound = 0.30 * 1.0 + 0.15 * weather + 1e-9
+    n_bottoms = len(bottoms)
+
+    # Min-heap of (rounded score, -combination index, top index, bottom index);
+    # ties are broken by combination order, like the stable full sort
+    heap = []
+
+    for top_bound, ti, top_features, top_occ, top_pref in top_list:
+        if len(heap) == limit and round(base_bound + top_bound + bottom_list[0][0], 3) < heap[0][0]:
+            break
+
+        for bottom_bound, bi, bottom_features, bottom_occ, bottom_pref in bottom_list:
+            if len(heap) == limit and round(base_bound + top_bound + bottom_bound, 3) < heap[0][0]:
+                break
+
+            color_score = pair_color_score(top_features, bottom_features)
+            occ_score = (top_occ + bottom_occ) / 2
+            pref_score = (top_pref + bottom_pref) / 2
+
+            final_score = (
+                0.30 * color_score +
+                0.20 * occ_score +
+                0.15 * weather +
+                0.35 * pref_score
+            )
+
+            entry = (round(final_score, 3), -(ti * n_bottoms + bi), ti, bi)
+            if len(heap) < limit:
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:
+                heapq.heapreplace(heap, entry)
+
+    outfits = []
+    for i, (score, _, ti, bi) in enumerate(sorted(heap, reverse=True)):
+        outfits.append({
+            "top": tops[ti],
+            "bottom": bottoms[bi],
+            # Same tiny rank bias as the exhaustive engine
+            "score": round(score - (i * 0.001), 3)
+        })
+
+    return outfits
+
+
+# -------------------------------------------------
+# Engine Selection
+# -------------------------------------------------
+
+# "vectorized": NumPy score matrix (fastest for typical wardrobes)
+# "streaming": bounded heap with pruning (O(limit) memory, huge wardrobes)
+# "exhaustive": the reference implementation
+RANKING_MODE = os.getenv("RANKING_MODE", "vectorized")
+
+RANKING_ENGINES = {
+    "vectorized": generate_ranked_outfits_vectorized,
+    "streaming": generate_ranked_outfits_streaming,
+    "exhaustive": generate_ranked_outfits
+}
+
+
+def rank_outfits(tops, bottoms, context, limit=3, mode=None):
+    engine = RANKING_ENGINES.get(mode or RANKING_MODE, generate_ranked_outfits_vectorized)
+    return engine(tops, bottoms, context, limit)
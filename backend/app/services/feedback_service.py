@@ -0,0 +1,372 @@
+import os
+import threading
+import time
+import uuid
+import logging
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from bson.objectid import ObjectId
+from pymongo import UpdateOne, ASCENDING
+from pymongo.errors import DuplicateKeyError
+
+from app.config.db import wardrobe_collection, feedback_events_collection, feedback_leases_collection
+from app.repositories import feedback_repository
+from app.services.wardrobe_version import bump_wardrobe_version
+from app.services.wardrobe_stats import refresh_preference_sum
+
+logger = logging.getLogger(__name__)
+
+MAX_PREF = 5
+MIN_PREF = -5
+
+# Seconds between aggregation passes
+FEEDBACK_AGGREGATE_INTERVAL = float(os.getenv("FEEDBACK_AGGREGATE_INTERVAL", "10"))
+# Events claimed this long ago but never applied (crashed worker) are retried
+CLAIM_TIMEOUT = timedelta(minutes=10)
+
+# Aggregation passes and replays hold this lease (in feedback_leases), so a
+# replay never runs while any worker is applying events
+AGGREGATION_LEASE = "feedback_aggregation"
+# A replay resets and re-folds every event in scope, which can take a while
+REPLAY_LEASE_TIMEOUT = timedelta(hours=1)
+# Seconds a replay waits for a running aggregation pass to finish
+REPLAY_LEASE_WAIT = 60
+
+# Item field listing the changes (see event_changes) already written to it.
+# Written in the same update as the change itself, so an event retried
+# after a crash is never applied to an item twice; cleared once the
+# events are marked applied.
+APPLIED_CHANGES = "applied_changes"
+
+# Event status: pending → claimed (by one aggregator) → applied
+PENDING = "pending"
+CLAIMED = "claimed"
+APPLIED = "applied"
+
+
+# -------------------------------------------------
+# Write path: one insert per feedback submission
+# -------------------------------------------------
+def build_feedback_event(user_id, liked_items, disliked_items, worn_items):
+    return {
+        "user_id": user_id,
+        "liked_items": liked_items,
+        "disliked_items": disliked_items,
+        "worn_items": worn_items,
+        "created_at": datetime.utcnow(),
+        "status": PENDING
+    }
+
+
+async def record_feedback_async(user_id, liked_items, disliked_items, worn_items):
+    event = build_feedback_event(user_id, liked_items, disliked_items, worn_items)
+    return await feedback_repository.insert_event(event)
+
+
+# -------------------------------------------------
+# Update Builders
+# -------------------------------------------------
+def to_object_id(item_id: str):
+    if not item_id:
+        return None
+
+    try:
+        return ObjectId(item_id)
+    except:
+        return None
+
+
+def preference_update(obj_id, change: int, user_id: str, tags):
+    """
+    Atomic preference change, clamped between -5 and +5 by the server
+    (pipeline update, so there is no read-modify-write race).
+    Skipped when any of tags was already applied to the item.
+    """
+    return UpdateOne(
+        {"_id": obj_id, "user_id": user_id, APPLIED_CHANGES: {"$nin": tags}},
+        [{
+            "$set": {
+                "preference_score": {
+                    "$max": [MIN_PREF, {
+                        "$min": [MAX_PREF, {
+                            "$add": [{"$ifNull": ["$preference_score", 0]}, change]
+                        }]
+                    }]
+                },
+                APPLIED_CHANGES: {"$concatArrays": [{"$ifNull": ["$" + APPLIED_CHANGES, []]}, tags]}
+            }
+        }]
+    )
+
+
+def usage_update(obj_id, user_id: str, count: int, used_at: datetime, tags):
+    return UpdateOne(
+        {"_id": obj_id, "user_id": user_id, APPLIED_CHANGES: {"$nin": tags}},
+        {
+            "$inc": {"usage_count": count},
+            # $max so folding events out of order never moves recency backwards
+            "$max": {"last_used": used_at},
+            "$push": {APPLIED_CHANGES: {"$each": tags}}
+        }
+    )
+
+
+# -------------------------------------------------
+# Aggregation: fold events into per-item stats
+# -------------------------------------------------
+def event_changes(events):
+    """
+    The item changes of events (oldest first), one per like / dislike and
+    one per worn item: (obj_id, user_id, tag, change, created_at), where
+    change is +1 / -1, or None for a wear. The tag names the change the
+    same way every time the event is folded.
+    """
+    for event in events:
+        user_id = event["user_id"]
+        event_id = str(event["_id"])
+        positions = {}
+
+        for item_ids, change in ((event.get("liked_items", []), 1), (event.get("disliked_items", []), -1)):
+            for item_id in item_ids:
+                obj_id = to_object_id(item_id)
+                if not obj_id:
+                    continue
+                positions[obj_id] = positions.get(obj_id, -1) + 1
+                yield obj_id, user_id, f"{event_id}:{positions[obj_id]}", change, event["created_at"]
+
+        for item_id in event.get("worn_items", []):
+            obj_id = to_object_id(item_id)
+            if obj_id:
+                yield obj_id, user_id, f"{event_id}:worn", None, event["created_at"]
+
+
+def fold_events(events, applied=None):
+    """
+    Turn events (oldest first) into the wardrobe writes that apply them,
+    leaving out changes already applied ({obj_id: tags} in applied).
+
+    Preference changes of one item are kept in order, but consecutive
+    changes with the same sign are merged: clamping +1 then +1 is the same
+    as clamping +2. Usage is summed per item and recency is the latest wear.
+    """
+    applied = applied or {}
+    preference = {}
+    usage = {}
+
+    for obj_id, user_id, tag, change, created_at in event_changes(events):
+        if tag in applied.get(obj_id, ()):
+            continue
+
+        if change is None:
+            count, last, tags = usage.get((obj_id, user_id), (0, None, []))
+            if tag not in tags:
+                tags.append(tag)
+            usage[(obj_id, user_id)] = (count + 1, max(last, created_at) if last else created_at, tags)
+            continue
+
+        runs = preference.setdefault((obj_id, user_id), [])
+        if runs and (runs[-1][0] > 0) == (change > 0):
+            runs[-1][0] += change
+            runs[-1][1].append(tag)
+        else:
+            runs.append([change, [tag]])
+
+    ops = []
+    for (obj_id, user_id), runs in preference.items():
+        ops += [preference_update(obj_id, change, user_id, tags) for change, tags in runs]
+    for (obj_id, user_id), (count, last, tags) in usage.items():
+        ops.append(usage_update(obj_id, user_id, count, last, tags))
+
+    return ops
+
+
+def applied_changes(obj_ids):
+    """
+    {obj_id: tags} of the items still listing applied changes, i.e. ones
+    whose events were written but not marked applied (crash in between)
+    """
+    cursor = wardrobe_collection.find(
+        {"_id": {"$in": obj_ids}, APPLIED_CHANGES: {"$exists": True, "$ne": []}},
+        {APPLIED_CHANGES: 1}
+    )
+    return {doc["_id"]: set(doc[APPLIED_CHANGES]) for doc in cursor}
+
+
+def apply_events(events):
+    """
+    One ordered bulk_write for all events, then mark them applied and
+    bump the affected wardrobe versions.
+    Returns the ids of the users whose wardrobe changed.
+
+    Every write records its changes on the item (APPLIED_CHANGES) and is
+    skipped when they are already there, so events retried after a crash
+    between the bulk_write and marking them applied are not applied twice.
+    """
+    if not events:
+        return set()
+
+    changes = list(event_changes(events))
+    obj_ids = list({obj_id for obj_id, *_ in changes})
+
+    ops = fold_events(events, applied_changes(obj_ids))
+    if ops:
+        wardrobe_collection.bulk_write(ops, ordered=True)
+
+    feedback_events_collection.update_many(
+        {"_id": {"$in": [event["_id"] for event in events]}},
+        {"$set": {"status": APPLIED, "applied_at": datetime.utcnow()}}
+    )
+
+    # Applied events are never claimed again, so their tags can go
+    if obj_ids:
+        wardrobe_collection.update_many(
+            {"_id": {"$in": obj_ids}},
+            {"$pull": {APPLIED_CHANGES: {"$in": [tag for _, _, tag, _, _ in changes]}}}
+        )
+
+    user_ids = {event["user_id"] for event in events}
+    for user_id in user_ids:
+        bump_wardrobe_version(user_id)
+        refresh_preference_sum(user_id)
+
+    return user_ids
+
+
+def claim_events(query):
+    """
+    Atomically claim matching events for this aggregator only, so several
+    app workers can aggregate without folding the same events at once
+    """
+    claim = uuid.uuid4().hex
+    feedback_events_collection.update_many(
+        query,
+        {"$set": {"status": CLAIMED, "claim": claim, "claimed_at": datetime.utcnow()}}
+    )
+    return list(
+        feedback_events_collection.find({"claim": claim})
+        .sort([("created_at", ASCENDING), ("_id", ASCENDING)])
+    )
+
+
+def acquire_lease(owner, timeout):
+    now = datetime.utcnow()
+    try:
+        feedback_leases_collection.update_one(
+            {"_id": AGGREGATION_LEASE, "$or": [{"expires_at": {"$lt": now}}, {"owner": owner}]},
+            {"$set": {"owner": owner, "expires_at": now + timeout}},
+            upsert=True
+        )
+        return True
+    except DuplicateKeyError:
+        # Held by someone else: the filter missed and the upsert hit the _id
+        return False
+
+
+@contextmanager
+def aggregation_lease(timeout=CLAIM_TIMEOUT, wait=0):
+    """
+    Hold the aggregation lease for the block; yields False when another
+    aggregator or replay still holds it after waiting wait seconds
+    """
+    owner = uuid.uuid4().hex
+    deadline = time.monotonic() + wait
+    while not acquire_lease(owner, timeout):
+        if time.monotonic() >= deadline:
+            yield False
+            return
+        time.sleep(1)
+
+    try:
+        yield True
+    finally:
+        feedback_leases_collection.delete_one({"_id": AGGREGATION_LEASE, "owner": owner})
+
+
+def aggregate_pending():
+    """
+    Apply every pending event (and ones stuck in an abandoned claim).
+    Returns the ids of the users whose wardrobe changed; nothing is done
+    while another pass or a replay holds the aggregation lease.
+    """
+    with aggregation_lease() as acquired:
+        if not acquired:
+            return set()
+
+        events = claim_events({
+            "$or": [
+                {"status": PENDING},
+                {"status": CLAIMED, "claimed_at": {"$lt": datetime.utcnow() - CLAIM_TIMEOUT}}
+            ]
+        })
+        return apply_events(events)
+
+
+def replay_feedback(user_id=None):
+    """
+    Rebuild preference / usage / recency of wardrobe items from the event log.
+    Items (or items of user_id) are reset first, then every event is folded
+    again in order. After a replay for every user, run
+    scripts/reconcile_wardrobe_stats.py to refresh users without events.
+
+    Safe while the app is running: the replay holds the aggregation lease,
+    so it waits (up to REPLAY_LEASE_WAIT seconds) for a running aggregation
+    pass to finish and aggregators skip their passes until it is done.
+    Raises RuntimeError when the lease cannot be taken.
+    """
+    scope = {"user_id": user_id} if user_id else {}
+
+    with aggregation_lease(REPLAY_LEASE_TIMEOUT, wait=REPLAY_LEASE_WAIT) as acquired:
+        if not acquired:
+            raise RuntimeError("Feedback aggregation is busy; try the replay again later")
+
+        events = claim_events(scope)
+
+        wardrobe_collection.update_many(
+            scope,
+            {
+                "$set": {"preference_score": 0, "usage_count": 0},
+                "$unset": {"last_used": "", APPLIED_CHANGES: ""}
+            }
+        )
+
+        user_ids = apply_events(events)
+
+    # The reset changed preferences even if no events were replayed
+    if user_id and user_id not in user_ids:
+        refresh_preference_sum(user_id)
+
+    return user_ids
+
+
+class FeedbackAggregator:
+    """
+    Background thread that folds pending feedback events every
+    FEEDBACK_AGGREGATE_INTERVAL seconds
+    """
+
+    def __init__(self, interval=FEEDBACK_AGGREGATE_INTERVAL):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="feedback-aggregator", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval + 5)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                aggregate_pending()
+            except Exception:
+                logger.exception("Feedback aggregation failed")
+
+
+feedback_aggregator = FeedbackAggregator()
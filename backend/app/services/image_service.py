@@ -1,20 +1,60 @@
 from rembg import remove, new_session
-from PIL import Image
+from PIL import Image, ImageChops, ImageFilter
 import os
 import uuid
 
+from app.services.metrics import stage
+
 UPLOAD_DIR = "app/uploads"
 PROCESSED_DIR = "app/static/processed"
 
+# Pixels with alpha below this are made fully transparent after background removal
+ALPHA_THRESHOLD = int(os.getenv("ALPHA_THRESHOLD", "100"))
+# Optional softening of the cut-out edge (Gaussian radius in px, 0 = off)
+ALPHA_FEATHER_RADIUS = float(os.getenv("ALPHA_FEATHER_RADIUS", "0"))
+
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 os.makedirs(PROCESSED_DIR, exist_ok=True)
 
 
-# Initialize the lightweight model ONCE when the module loads
-# This ensures we don't accidentally trigger the default 'u2net' download
-u2netp_session = new_session("u2netp")
+# The lightweight model is initialized ONCE per process, on first use,
+# so upload worker processes load it themselves instead of inheriting it.
+# Always 'u2netp' so we don't accidentally trigger the default 'u2net' download
+u2netp_session = None
+
+
+def get_session():
+    global u2netp_session
+    if u2netp_session is None:
+        u2netp_session = new_session("u2netp")
+    return u2netp_session
+
+
+def clean_alpha(image, threshold=ALPHA_THRESHOLD, feather_radius=ALPHA_FEATHER_RADIUS):
+    """
+    Low alpha → fully transparent (0, 0, 0, 0), done in place on the RGBA
+    image buffer with a lookup-table mask instead of a per-pixel loop.
+    Feathering only softens the remaining edge, it never grows the cut-out.
+    """
+    alpha = image.getchannel("A")
+
+    # 255 wherever the pixel must be cleared
+    mask = alpha.point([255 if a < threshold else 0 for a in range(256)])
+    image.paste((0, 0, 0, 0), mask=mask)
+
+    if feather_radius > 0:
+        alpha = image.getchannel("A")
+        blurred = alpha.filter(ImageFilter.GaussianBlur(feather_radius))
+        image.putalpha(ImageChops.darker(alpha, blurred))
+
+    return image
+
 
 def process_image(file):
+    return process_image_bytes(file.file.read())
+
+
+def process_image_bytes(data):
     file_id = str(uuid.uuid4())
 
     input_path = f"{UPLOAD_DIR}/{file_id}.png"
@@ -22,33 +62,26 @@ def process_image(file):
 
     # Save original
     with open(input_path, "wb") as buffer:
-        buffer.write(file.file.read())
-
-    # Open image
-    input_image = Image.open(input_path).convert("RGBA")
-
-    # Remove background using the globally initialized lightweight model session
-    output_image = remove(input_image, session=u2netp_session)
+        buffer.write(data)
 
-    # Resize
-    output_image = output_image.resize((400, 400))
+    try:
+        # Open image
+        input_image = Image.open(input_path).convert("RGBA")
 
-    # Clean semi-transparent edges
-    pixels = output_image.getdata()
-    new_pixels = []
+        # Remove background using the globally initialized lightweight model session
+        with stage("background_removal"):
+            output_image = remove(input_image, session=get_session())
 
-    for item in pixels:
-        if item[3] < 100:  # low alpha → make fully transparent
-            new_pixels.append((0, 0, 0, 0))
-        else:
-            new_pixels.append(item)
+        # Resize
+        output_image = output_image.resize((400, 400))
 
-    output_image.putdata(new_pixels)
+        # Clean semi-transparent edges
+        clean_alpha(output_image)
 
-    output_image.save(output_path)
-    
-    # Clean up the original uploaded image to save disk space
-    if os.path.exists(input_path):
-        os.remove(input_path)
+        output_image.save(output_path)
+    finally:
+        # Clean up the original uploaded image to save disk space (also when it was unreadable)
+        if os.path.exists(input_path):
+            os.remove(input_path)
 
     return output_path
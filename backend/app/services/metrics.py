@@ -0,0 +1,285 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Request / stage timing, exported as Prometheus histograms on /metrics
+# and per response in a Server-Timing header.
+#
+# Code marks the parts of a request worth attributing with
+#
+#     with stage("scoring"):
+#         ...
+#
+# Timings are collected in a list held in a ContextVar, set by the
+# middleware for each request (and by collect() for upload jobs), so
+# stages inside run_in_threadpool are attributed to the right request.
+# Upload worker processes return their stage timings with their result
+# (call_with_timings).
+#
+# When METRICS_ENABLED is off nothing sets the ContextVar, the
+# middleware is not installed and stage() is a lookup + None check.
+#
+# This module must stay importable from upload worker processes
+# (no database or web imports).
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() in ("1", "true", "yes")
+
+# Histogram bucket upper bounds (seconds)
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_timings = ContextVar("stage_timings", default=None)
+
+
+# -------------------------------------------------
+# Histograms
+# -------------------------------------------------
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+class Histogram:
+    """
+    Minimal Prometheus histogram (per process)
+    """
+
+    def __init__(self, name, description, labels, buckets=BUCKETS):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.buckets = buckets
+        # label values -> [count per bucket (+Inf last), sum, count]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} histogram"
+        ]
+        with self._lock:
+            series = sorted((labels, [list(s[0]), s[1], s[2]]) for labels, s in self._series.items())
+
+        for label_values, (counts, total, count) in series:
+            labels = ",".join(
+                f'{name}="{escape_label(value)}"' for name, value in zip(self.labels, label_values)
+            )
+            prefix = labels + "," if labels else ""
+
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {count}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total}")
+            lines.append(f"{self.name}_count{{{labels}}} {count}")
+
+        return "\n".join(lines)
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+request_duration = Histogram(
+    "autostylist_http_request_duration_seconds",
+    "Time spent handling HTTP requests",
+    ["method", "route", "status"]
+)
+stage_duration = Histogram(
+    "autostylist_stage_duration_seconds",
+    "Time spent in each stage of a request or upload job",
+    ["route", "stage"]
+)
+
+
+# Callables returning extra exposition text, registered by modules that
+# keep their own counters (e.g. the auth caches)
+_collectors = []
+
+
+def register_collector(collector):
+    _collectors.append(collector)
+    return collector
+
+
+def render_family(name, description, kind, samples):
+    """
+    One counter / gauge family; samples are (labels dict, value) pairs
+    """
+    lines = [
+        f"# HELP {name} {description}",
+        f"# TYPE {name} {kind}"
+    ]
+    for labels, value in samples:
+        text = ",".join(f'{label}="{escape_label(v)}"' for label, v in labels.items())
+        lines.append(f"{name}{{{text}}} {value}" if text else f"{name} {value}")
+    return "\n".join(lines)
+
+
+def render_metrics():
+    """
+    Prometheus text exposition format (0.0.4)
+    """
+    parts = [histogram.render() for histogram in (request_duration, stage_duration)]
+    parts.extend(collector() for collector in _collectors)
+    return "\n".join(parts) + "\n"
+
+
+# -------------------------------------------------
+# Stage Timers
+# -------------------------------------------------
+
+@contextmanager
+def stage(name):
+    timings = _timings.get()
+    if timings is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.append((name, time.perf_counter() - start))
+
+
+def record_stage(name, seconds):
+    """
+    Add a stage measured some other way (e.g. time spent queued)
+    """
+    timings = _timings.get()
+    if timings is not None:
+        timings.append((name, seconds))
+
+
+def add_timings(timings):
+    """
+    Merge stage timings returned by a worker process
+    """
+    current = _timings.get()
+    if current is not None and timings:
+        current.extend(timings)
+
+
+def call_with_timings(fn, *args):
+    """
+    Runs fn in a worker process with its own stage list.
+    Returns (result, timings); the caller passes timings to add_timings.
+    """
+    token = _timings.set([])
+    try:
+        result = fn(*args)
+        return result, _timings.get()
+    finally:
+        _timings.reset(token)
+
+
+def observe_stages(route, timings):
+    for name, seconds in timings:
+        stage_duration.observe(seconds, route, name)
+
+
+@contextmanager
+def collect(route):
+    """
+    Stage timing for work outside a request (upload jobs)
+    """
+    if not METRICS_ENABLED:
+        yield None
+        return
+
+    timings = []
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
+        observe_stages(route, timings)
+
+
+def server_timing(timings, total):
+    """
+    Server-Timing header value; repeated stages are summed
+    """
+    durations = {}
+    for name, seconds in timings:
+        durations[name] = durations.get(name, 0.0) + seconds
+    parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in durations.items()]
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+# -------------------------------------------------
+# Middleware
+# -------------------------------------------------
+
+def route_label(scope):
+    """
+    Path template of the matched route ("/api/wardrobe/{item_id}"), or
+    "unmatched". Rebuilt from the request path and its path parameters,
+    since the route object only knows its path within its router.
+    """
+    if scope.get("route") is None:
+        return "unmatched"
+
+    names = {str(value): name for name, value in scope.get("path_params", {}).items()}
+    segments = scope["path"].split("/")
+    for i in reversed(range(len(segments))):
+        name = names.pop(segments[i], None)
+        if name:
+            segments[i] = "{" + name + "}"
+    return "/".join(segments)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware: request histogram, stage histograms and the
+    Server-Timing header. Routes are labelled with their path template
+    ("/api/wardrobe/{item_id}") so label cardinality stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = []
+        token = _timings.set(timings)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                header = server_timing(timings, time.perf_counter() - start)
+                message = {
+                    **message,
+                    "headers": [*message.get("headers", []), (b"server-timing", header.encode("latin-1"))]
+                }
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _timings.reset(token)
+            route = route_label(scope)
+            request_duration.observe(time.perf_counter() - start, scope["method"], route, str(status))
+            observe_stages(route, timings)
@@ -0,0 +1,175 @@
+from datetime import datetime
+
+import numpy as np
+
+from app.services.decision_engine import (
+    OCCASION_STYLES,
+    pack_items,
+    score_matrix,
+    preference_score
+)
+from app.services.accessories_engine import select_extras_batch
+
+FULL_BODY_CATEGORIES = ["full_body", "saree", "lehenga"]
+
+
+# -------------------------------------------------
+# Helpers
+# -------------------------------------------------
+
+def slot_time(day):
+    """
+    Slot dates are plain dates; recency is measured in whole days
+    """
+    return datetime(day.year, day.month, day.day)
+
+
+def partition_items(items):
+    """
+    Category -> items, with every full body category merged
+    """
+    by_category = {}
+    for item in items:
+        category = item.get("category")
+        if category in FULL_BODY_CATEGORIES:
+            category = "full_body"
+        by_category.setdefault(category, []).append(item)
+    return by_category
+
+
+def build_pool(by_category, occasion, gender, weather_type):
+    """
+    Everything about an occasion that does not change between slots:
+    its candidates and the pair scores without the preference term
+    """
+    styles = OCCASION_STYLES.get(occasion, [])
+
+    if gender == "female" and occasion == "traditional" and by_category.get("full_body"):
+        return {"full_body": by_category["full_body"]}
+
+    tops = [item for item in by_category.get("top", []) if item.get("style") in styles]
+    bottoms = [item for item in by_category.get("bottom", []) if item.get("style") in styles]
+    if not tops or not bottoms:
+        return None
+
+    top_pack = pack_items(tops, occasion)
+    bottom_pack = pack_items(bottoms, occasion)
+
+    # Preference rolls forward across the plan, so it is added per slot
+    top_pack["preference"] = np.zeros(len(tops))
+    bottom_pack["preference"] = np.zeros(len(bottoms))
+
+    return {
+        "tops": tops,
+        "bottoms": bottoms,
+        "base": score_matrix(top_pack, bottom_pack, weather_type)
+    }
+
+
+# -------------------------------------------------
+# Planner
+# -------------------------------------------------
+
+def plan_outfits(items, slots, gender, weather_type):
+    """
+    Assigns one outfit per (date, occasion) slot in a single pass.
+
+    - Each occasion's pair matrix is scored once, then only the
+      preference term is recomputed per slot.
+    - Slots are filled in date order; every planned outfit counts as
+      worn on its date, so preference_score's recency and usage
+      penalties roll forward to later slots.
+    - An item is not repeated until every candidate on its side
+      (tops, bottoms or full body pieces) has been used (rotation).
+
+    Returns one outfit dict (or None when the wardrobe cannot dress
+    the occasion) per slot, in the order the slots were given.
+    """
+    by_category = partition_items(items)
+    pools = {}
+
+    # _id -> item as it will look after earlier planned days
+    planned = {}
+    used = set()
+
+    def current(item):
+        return planned.get(item["_id"], item)
+
+    def wear(item, when):
+        state = current(item)
+        planned[item["_id"]] = {
+            **state,
+            "last_used": when,
+            "usage_count": state.get("usage_count", 0) + 1
+        }
+        used.add(item["_id"])
+
+    def unused(candidates):
+        """
+        Mask of candidates not used in this rotation; starts a new
+        rotation for this side when all of them have been
+        """
+        mask = np.array([item["_id"] not in used for item in candidates], dtype=bool)
+        if not mask.any():
+            used.difference_update(item["_id"] for item in candidates)
+            mask[:] = True
+        return mask
+
+    outfits = [None] * len(slots)
+    order = sorted(range(len(slots)), key=lambda i: slots[i]["date"])
+
+    for i in order:
+        occasion = slots[i]["occasion"]
+        now = slot_time(slots[i]["date"])
+
+        if occasion not in pools:
+            pools[occasion] = build_pool(by_category, occasion, gender, weather_type)
+        pool = pools[occasion]
+        if pool is None:
+            continue
+
+        if "full_body" in pool:
+            candidates = pool["full_body"]
+            scores = np.array([preference_score(current(item), now) for item in candidates])
+            scores[~unused(candidates)] = -np.inf
+
+            # First best, like the stable preference sort in /recommend
+            item = candidates[int(np.argmax(scores))]
+            outfits[i] = {"full_body": item, "score": round(float(scores.max()), 3)}
+            wear(item, now)
+            continue
+
+        tops, bottoms = pool["tops"], pool["bottoms"]
+        top_pref = np.array([preference_score(current(item), now) for item in tops])
+        bottom_pref = np.array([preference_score(current(item), now) for item in bottoms])
+
+        scores = pool["base"] + 0.35 * (top_pref[:, None] + bottom_pref[None, :]) / 2
+        scores[~unused(tops), :] = -np.inf
+        scores[:, ~unused(bottoms)] = -np.inf
+
+        ti, bi = np.unravel_index(int(np.argmax(scores)), scores.shape)
+        outfits[i] = {
+            "top": tops[ti],
+            "bottom": bottoms[bi],
+            "score": round(float(scores[ti, bi]), 3)
+        }
+        wear(tops[ti], now)
+        wear(bottoms[bi], now)
+
+    # Extras for every slot of an occasion are picked in one batch
+    for occasion in pools:
+        group = [
+            outfit for outfit, slot in zip(outfits, slots)
+            if outfit and slot["occasion"] == occasion
+        ]
+        extras = select_extras_batch(
+            group,
+            by_category.get("shoes", []),
+            by_category.get("accessories", []),
+            by_category.get("jewellery", []),
+            {"occasion": occasion, "weather_type": weather_type}
+        )
+        for outfit, selected in zip(group, extras):
+            outfit["extras"] = selected
+
+    return outfits
@@ -0,0 +1,280 @@
+import asyncio
+import hmac
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from starlette.concurrency import run_in_threadpool as _run_in_threadpool
+
+from app.services.metrics import route_label
+
+# Opt-in sampling profiler for live requests.
+#
+# A sampled request gets a Profile; while any are in flight one daemon
+# thread reads sys._current_frames() every PROFILE_INTERVAL_MS and
+# records the stacks of the threads working for them:
+#   - the event loop thread, while the request's own task is running
+#   - threadpool threads running a call made through run_in_threadpool
+#     below (marked for the duration of the call)
+# Upload jobs queued by a sampled request are profiled inside the upload
+# worker process (call_profiled) and their stacks sent back with the result.
+#
+# Stacks are aggregated per route in collapsed format
+# ("root;frame;frame count"), ready for flamegraph.pl / speedscope, and
+# served on GET /admin/profile.
+#
+# Unsampled requests pay a header check and a random() call; when
+# PROFILE_ADMIN_TOKEN is unset nothing is installed at all.
+#
+# Upload worker processes import this module (call_profiled), so it must
+# not import the database layer.
+
+# Enables the profiler. Requests sending it in X-Profile-Token are always
+# profiled, and it is required to read / clear the collected stacks.
+PROFILE_ADMIN_TOKEN = os.getenv("PROFILE_ADMIN_TOKEN", "")
+# Share of all other requests profiled (0.01 = 1 in 100)
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+# Time between stack samples
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+# Distinct stacks kept; further ones are counted under "<root>;[truncated]"
+PROFILE_MAX_STACKS = int(os.getenv("PROFILE_MAX_STACKS", "20000"))
+
+PROFILER_ENABLED = bool(PROFILE_ADMIN_TOKEN)
+
+PROFILE_HEADER = b"x-profile-token"
+
+_current = ContextVar("profile", default=None)
+
+
+def is_admin_token(token):
+    return PROFILER_ENABLED and bool(token) and hmac.compare_digest(token, PROFILE_ADMIN_TOKEN)
+
+
+# -------------------------------------------------
+# Stacks
+# -------------------------------------------------
+
+def frame_name(frame):
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def collapse(frame):
+    """
+    "outermost;...;innermost" for a thread's current frame
+    """
+    names = []
+    while frame is not None:
+        names.append(frame_name(frame))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class StackTable:
+    """
+    Collapsed stack counts, aggregated over all profiled requests
+    """
+
+    def __init__(self, max_stacks=PROFILE_MAX_STACKS):
+        self.max_stacks = max_stacks
+        self.counts = Counter()
+        self._lock = threading.Lock()
+
+    def add(self, root, samples):
+        with self._lock:
+            for stack, count in samples.items():
+                key = f"{root};{stack}"
+                if key not in self.counts and len(self.counts) >= self.max_stacks:
+                    key = f"{root};[truncated]"
+                self.counts[key] += count
+
+    def collapsed(self, root=None):
+        """
+        One "stack count" line per stack, optionally only under root
+        """
+        with self._lock:
+            items = sorted(self.counts.items())
+        if root:
+            items = [(stack, count) for stack, count in items if stack.startswith(root + ";")]
+        return "".join(f"{stack} {count}\n" for stack, count in items)
+
+    def clear(self):
+        with self._lock:
+            self.counts.clear()
+
+
+stacks = StackTable()
+
+
+# -------------------------------------------------
+# Sampling
+# -------------------------------------------------
+
+class Profile:
+    """
+    Samples of one request or upload job
+    """
+
+    def __init__(self, root=None):
+        self.root = root
+        self.samples = Counter()
+        # Threadpool threads currently working for this profile
+        self.threads = set()
+        self.loop = None
+        self.task = None
+        self.loop_thread = None
+
+    def attach_task(self):
+        self.loop = asyncio.get_running_loop()
+        self.task = asyncio.current_task()
+        self.loop_thread = threading.get_ident()
+
+    def run(self, fn, *args, **kwargs):
+        ident = threading.get_ident()
+        self.threads.add(ident)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.threads.discard(ident)
+
+    def sample(self, frames):
+        idents = list(self.threads)
+        if self.task is not None and asyncio.current_task(self.loop) is self.task:
+            idents.append(self.loop_thread)
+
+        for ident in idents:
+            frame = frames.get(ident)
+            if frame is not None:
+                self.samples[collapse(frame)] += 1
+
+
+class Sampler:
+    """
+    One daemon thread per process, only running while profiles are active
+    """
+
+    def __init__(self, interval=PROFILE_INTERVAL_MS / 1000):
+        self.interval = interval
+        self._profiles = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self, profile):
+        with self._lock:
+            self._profiles.add(profile)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+                self._thread.start()
+
+    def stop(self, profile):
+        # Once this returns the sampler no longer touches profile.samples
+        with self._lock:
+            self._profiles.discard(profile)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._profiles:
+                    self._thread = None
+                    return
+                frames = sys._current_frames()
+                for profile in self._profiles:
+                    profile.sample(frames)
+
+
+sampler = Sampler()
+
+
+def current():
+    return _current.get()
+
+
+@contextmanager
+def profiling(root=None):
+    """
+    Profile the current task (and the threadpool calls it makes) until
+    the block exits; the samples are added to stacks under profile.root
+    """
+    profile = Profile(root)
+    profile.attach_task()
+    token = _current.set(profile)
+    sampler.start(profile)
+    try:
+        yield profile
+    finally:
+        sampler.stop(profile)
+        _current.reset(token)
+        stacks.add(profile.root or "unknown", profile.samples)
+
+
+async def run_in_threadpool(fn, *args, **kwargs):
+    """
+    starlette's run_in_threadpool; the worker thread is sampled while it
+    runs fn for a profiled request
+    """
+    profile = _current.get()
+    if profile is None:
+        return await _run_in_threadpool(fn, *args, **kwargs)
+    return await _run_in_threadpool(profile.run, fn, *args, **kwargs)
+
+
+def call_profiled(fn, *args):
+    """
+    Runs fn in an upload worker process under its own sampler.
+    Returns (result, samples); the caller passes samples to merge_samples.
+    """
+    profile = Profile()
+    profile.threads.add(threading.get_ident())
+    local_sampler = Sampler()
+    local_sampler.start(profile)
+    try:
+        result = fn(*args)
+    finally:
+        local_sampler.stop(profile)
+    return result, dict(profile.samples)
+
+
+def merge_samples(samples):
+    profile = _current.get()
+    if profile is not None and samples:
+        profile.samples.update(samples)
+
+
+# -------------------------------------------------
+# Middleware
+# -------------------------------------------------
+
+def should_profile(scope):
+    if scope["path"].startswith("/admin/profile"):
+        return False
+    for name, value in scope["headers"]:
+        if name == PROFILE_HEADER:
+            return is_admin_token(value.decode("latin-1"))
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+class ProfilerMiddleware:
+    """
+    ASGI middleware profiling PROFILE_SAMPLE_RATE of requests, plus every
+    request carrying the admin token in X-Profile-Token
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        with profiling() as profile:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                profile.root = f"{scope['method']} {route_label(scope)}"
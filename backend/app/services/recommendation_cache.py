@@ -0,0 +1,69 @@
+import os
+
+from app.services.cache import TTLCache
+
+RECOMMEND_CACHE_TTL = int(os.getenv("RECOMMEND_CACHE_TTL", "300"))
+RECOMMEND_CACHE_SIZE = int(os.getenv("RECOMMEND_CACHE_SIZE", "1024"))
+
+
+class InMemoryCacheBackend:
+    """
+    Per-worker LRU + TTL storage. Any object with get(key) / set(key, value)
+    over string keys and JSON-serializable values can replace it
+    (e.g. a Redis-compatible client wrapper).
+    """
+
+    def __init__(self, maxsize=RECOMMEND_CACHE_SIZE, ttl=RECOMMEND_CACHE_TTL):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, key):
+        return self._cache.get(key)
+
+    def set(self, key, value):
+        self._cache.set(key, value)
+
+    def clear(self):
+        self._cache.clear()
+
+
+class RecommendationCache:
+    """
+    Caches the recommendations of /api/recommend.
+
+    Keys include the user's wardrobe version, so uploads, deletes and
+    applied feedback make old entries unreachable instead of needing
+    explicit invalidation; they age out through LRU / TTL.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(user_id, occasion, gender, weather_type, wardrobe_version):
+        return f"rec:{user_id}:{occasion}:{gender}:{weather_type}:{wardrobe_version}"
+
+    def get(self, key):
+        value = self.backend.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self.backend.set(key, value)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+
+recommendation_cache = RecommendationCache(InMemoryCacheBackend())
+
+
+def set_cache_backend(backend):
+    """
+    Swap the storage backend (counters are kept)
+    """
+    recommendation_cache.backend = backend
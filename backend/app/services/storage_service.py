@@ -0,0 +1,30 @@
+import os
+import cloudinary
+import cloudinary.uploader
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CLOUDINARY_FOLDER = "autostylist_wardrobe"
+
+# Configure Cloudinary globally
+cloudinary.config(
+    cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
+    api_key=os.getenv("CLOUDINARY_API_KEY"),
+    api_secret=os.getenv("CLOUDINARY_API_SECRET"),
+    secure=True
+)
+
+
+def upload_processed_image(processed_path):
+    """
+    Push a processed image to Cloudinary and return its secure URL.
+    The local file is removed afterwards either way.
+    """
+    try:
+        upload_result = cloudinary.uploader.upload(processed_path, folder=CLOUDINARY_FOLDER)
+        return upload_result.get("secure_url")
+    finally:
+        # Clean up the local processed file, we no longer need it
+        if os.path.exists(processed_path):
+            os.remove(processed_path)
@@ -0,0 +1,35 @@
+from app.services.image_service import process_image_bytes
+from app.services.color_service import extract_dominant_colors
+from app.services.metrics import stage
+
+# CPU-heavy upload stages. These run inside upload worker processes,
+# so this module must not import the database or web layers.
+
+
+def prepare_upload(data):
+    """
+    Background removal -> color extraction.
+    Returns the local processed image path and its colors.
+    """
+    processed_path = process_image_bytes(data)
+
+    # Extract colors from the local processed file
+    with stage("colors"):
+        colors = extract_dominant_colors(processed_path)
+
+    return processed_path, colors
+
+
+def prepare_batch(datas):
+    """
+    prepare_upload for several images in one worker call, so they all go
+    through this process's already-loaded u2netp session back to back.
+    Failures are returned per image instead of failing the batch.
+    """
+    results = []
+    for data in datas:
+        try:
+            results.append({"ok": True, "value": prepare_upload(data)})
+        except Exception as e:
+            results.append({"ok": False, "error": str(e)})
+    return results
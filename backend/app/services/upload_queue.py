@@ -0,0 +1,335 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+from pymongo.errors import BulkWriteError
+
+from app.repositories import wardrobe_repository
+from app.services import metrics, profiler
+from app.services.profiler import run_in_threadpool
+from app.services.decision_engine import compute_item_features
+from app.services.storage_service import upload_processed_image
+from app.services.upload_pipeline import prepare_upload, prepare_batch
+
+logger = logging.getLogger(__name__)
+
+# Messages shown to clients; the underlying errors are only logged
+PROCESSING_FAILED = "Image could not be processed"
+STORAGE_FAILED = "Image storage failed"
+SAVE_FAILED = "Item could not be saved"
+UPLOAD_FAILED = "Upload failed"
+
+# Uploads processed at the same time (= worker processes, each loads its own rembg model)
+UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", "1"))
+# Uploads waiting for a worker before new ones are rejected
+UPLOAD_QUEUE_SIZE = int(os.getenv("UPLOAD_QUEUE_SIZE", "32"))
+# Seconds a finished job stays available on the status endpoint
+UPLOAD_JOB_TTL = int(os.getenv("UPLOAD_JOB_TTL", "3600"))
+
+
+class UploadFailed(Exception):
+    """
+    Upload failure whose message is safe to return to the client
+    """
+
+
+def build_wardrobe_item(user_id, fields, colors, image_path):
+    item = {
+        "user_id": user_id,
+        "category": fields["category"],
+        "style": fields["style"],
+        "gender": fields["gender"],
+        "colors": colors,
+        "dominant_color": colors[0],
+        "color_count": len(colors),
+        "image_path": image_path,
+        "preference_score": 0,
+        "usage_count": 0,
+        "created_at": datetime.utcnow()
+    }
+
+    # Precompute per-item scoring features once, so recommendations don't have to
+    item["features"] = compute_item_features(item)
+    return item
+
+
+class UploadQueue:
+    """
+    Bounded queue of upload jobs.
+
+    Each job runs background removal and color extraction in a process pool
+    (so the event loop never does CPU work), then the Cloudinary upload and
+    DB insert in the thread pool. Batch jobs spread their images over all
+    pool processes, upload concurrently and insert with one insert_many.
+    Job state is kept in memory per worker.
+    """
+
+    def __init__(self, workers=UPLOAD_WORKERS, maxsize=UPLOAD_QUEUE_SIZE):
+        self.workers = workers
+        self.maxsize = maxsize
+        self.jobs = {}
+        self._queue = None
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._tasks = []
+
+    # ---------------------------
+    # Lifecycle
+    # ---------------------------
+
+    def start(self):
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._pool = self._new_pool()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._pool:
+            pool, self._pool = self._pool, None
+            # Waits for the worker processes; keep it off the event loop
+            await asyncio.get_running_loop().run_in_executor(
+                None, lambda: pool.shutdown(cancel_futures=True)
+            )
+
+    def _new_pool(self):
+        # 'spawn' so workers don't inherit the parent's Mongo client or model sessions
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+
+    def _replace_pool(self, broken):
+        """
+        Swap a broken pool for a new one. Concurrent callers that saw the
+        same failure (e.g. chunks of one batch) replace it only once.
+        """
+        with self._pool_lock:
+            if self._pool is not broken:
+                return
+            self._pool = self._new_pool()
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    # ---------------------------
+    # Jobs
+    # ---------------------------
+
+    def submit(self, user_id, data, fields):
+        """
+        Queue an upload and return its job.
+        Raises asyncio.QueueFull when too many uploads are waiting.
+        """
+        return self._enqueue(user_id, self._run_single, data, fields)
+
+    def submit_batch(self, user_id, entries):
+        """
+        Queue several uploads as one job; entries are (data, fields) pairs.
+        The job result lists the outcome of every entry in order, tagged
+        with fields["index"] when given.
+        """
+        return self._enqueue(user_id, self._run_batch, entries)
+
+    def _enqueue(self, user_id, runner, *args):
+        self._prune()
+
+        job = {
+            "id": uuid.uuid4().hex,
+            "user_id": user_id,
+            "status": "queued",
+            "result": None,
+            "error": None,
+            "created_at": time.time(),
+            "finished_at": None
+        }
+        # Jobs queued by a profiled request are profiled too
+        profiled = profiler.current() is not None
+        self._queue.put_nowait((job, runner, args, profiled))
+        self.jobs[job["id"]] = job
+        return job
+
+    def get_job(self, job_id):
+        return self.jobs.get(job_id)
+
+    def _prune(self):
+        cutoff = time.time() - UPLOAD_JOB_TTL
+        for job_id in [j["id"] for j in self.jobs.values() if j["finished_at"] and j["finished_at"] < cutoff]:
+            del self.jobs[job_id]
+
+    async def _worker(self):
+        while True:
+            job, runner, args, profiled = await self._queue.get()
+            job["status"] = "processing"
+            try:
+                with metrics.collect("upload_job"), (profiler.profiling("upload_job") if profiled else nullcontext()):
+                    metrics.record_stage("queue_wait", time.time() - job["created_at"])
+                    job["result"] = await runner(job, *args)
+                job["status"] = "done"
+            except UploadFailed as e:
+                job["error"] = str(e)
+                job["status"] = "failed"
+            except Exception:
+                logger.exception("Upload job %s failed", job["id"])
+                job["error"] = UPLOAD_FAILED
+                job["status"] = "failed"
+            finally:
+                job["finished_at"] = time.time()
+                self._queue.task_done()
+
+    async def _in_pool(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        # Stage timings and profiler samples from the worker process come back with the result
+        call, call_args = fn, args
+        profiled = profiler.current() is not None
+        if profiled:
+            call, call_args = profiler.call_profiled, (call, *call_args)
+        if metrics.METRICS_ENABLED:
+            call, call_args = metrics.call_with_timings, (call, *call_args)
+
+        pool = self._pool
+        try:
+            result = await loop.run_in_executor(pool, call, *call_args)
+        except BrokenProcessPool:
+            # A worker died (e.g. out of memory); replace the pool for the next jobs
+            self._replace_pool(pool)
+            raise
+
+        if metrics.METRICS_ENABLED:
+            result, timings = result
+            metrics.add_timings(timings)
+        if profiled:
+            result, samples = result
+            profiler.merge_samples(samples)
+        return result
+
+    async def _store(self, processed_path):
+        try:
+            with metrics.stage("storage"):
+                return await run_in_threadpool(upload_processed_image, processed_path)
+        except Exception as e:
+            logger.exception("Cloudinary upload failed")
+            raise UploadFailed(STORAGE_FAILED) from e
+
+    async def _record_added(self, job, items):
+        """
+        Version bump and stats delta for items that were saved. Failures
+        are only logged: the items exist, and failing the job would make
+        the client upload them again. scripts/reconcile_wardrobe_stats.py
+        repairs the stats.
+        """
+        try:
+            await wardrobe_repository.bump_version(job["user_id"])
+        except Exception:
+            logger.exception("Bumping the wardrobe version for upload job %s failed", job["id"])
+        try:
+            await wardrobe_repository.record_added(job["user_id"], items)
+        except Exception:
+            logger.exception("Updating wardrobe stats for upload job %s failed", job["id"])
+
+    async def _run_single(self, job, data, fields):
+        try:
+            processed_path, colors = await self._in_pool(prepare_upload, data)
+        except Exception as e:
+            logger.exception("Processing upload job %s failed", job["id"])
+            raise UploadFailed(PROCESSING_FAILED) from e
+        cloudinary_url = await self._store(processed_path)
+
+        item = build_wardrobe_item(job["user_id"], fields, colors, cloudinary_url)
+        with metrics.stage("db_write"):
+            await wardrobe_repository.insert_items([item])
+            await self._record_added(job, [item])
+
+        return {
+            "item_id": str(item["_id"]),
+            "colors": colors,
+            "image": cloudinary_url
+        }
+
+    async def _run_batch(self, job, entries):
+        results = [
+            {"index": fields.get("index", i), "status": "failed", "error": None}
+            for i, (_, fields) in enumerate(entries)
+        ]
+
+        # 1. Background removal + colors: split across the worker processes
+        datas = [data for data, _ in entries]
+        chunk_size = -(-len(datas) // self.workers)
+        chunks = [list(range(start, min(start + chunk_size, len(datas)))) for start in range(0, len(datas), chunk_size)]
+
+        chunk_outputs = await asyncio.gather(
+            *[self._in_pool(prepare_batch, [datas[i] for i in chunk]) for chunk in chunks],
+            return_exceptions=True
+        )
+        for output in chunk_outputs:
+            if isinstance(output, Exception):
+                logger.error("Processing a chunk of upload job %s failed", job["id"], exc_info=output)
+
+        prepared = {}
+        for chunk, output in zip(chunks, chunk_outputs):
+            for position, i in enumerate(chunk):
+                if isinstance(output, Exception):
+                    results[i]["error"] = PROCESSING_FAILED
+                elif not output[position]["ok"]:
+                    logger.warning("Processing image %s of upload job %s failed: %s", i, job["id"], output[position]["error"])
+                    results[i]["error"] = PROCESSING_FAILED
+                else:
+                    prepared[i] = output[position]["value"]
+
+        # 2. Cloudinary uploads, concurrently
+        indexes = list(prepared)
+        urls = await asyncio.gather(
+            *[self._store(prepared[i][0]) for i in indexes],
+            return_exceptions=True
+        )
+
+        # 3. One insert_many for everything that made it this far
+        items = []
+        for i, url in zip(indexes, urls):
+            if isinstance(url, Exception):
+                # _store has logged it
+                results[i]["error"] = STORAGE_FAILED
+                continue
+            colors = prepared[i][1]
+            item = build_wardrobe_item(job["user_id"], entries[i][1], colors, url)
+            items.append((i, item))
+
+        with metrics.stage("db_write"):
+            if items:
+                try:
+                    await wardrobe_repository.insert_items([item for _, item in items], ordered=False)
+                except BulkWriteError as e:
+                    # Unordered: everything except the reported documents was written
+                    rejected = {error["index"]: error.get("errmsg") for error in e.details.get("writeErrors", [])}
+                    for position in sorted(rejected, reverse=True):
+                        i, _ = items.pop(position)
+                        logger.warning("Saving image %s of upload job %s failed: %s", i, job["id"], rejected[position])
+                        results[i]["error"] = SAVE_FAILED
+
+            if items:
+                await self._record_added(job, [item for _, item in items])
+
+        for i, item in items:
+            results[i].update({
+                "status": "done",
+                "item_id": str(item["_id"]),
+                "colors": item["colors"],
+                "image": item["image_path"]
+            })
+
+        return {
+            "uploaded": len(items),
+            "failed": len(entries) - len(items),
+            "items": results
+        }
+
+
+upload_queue = UploadQueue()
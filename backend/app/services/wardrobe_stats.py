@@ -0,0 +1,202 @@
+from collections import Counter
+
+from pymongo import ReturnDocument, UpdateOne
+
+from app.config.db import wardrobe_collection, wardrobe_stats_collection
+from app.services.color_space import color_family
+
+# One document per user, kept current with atomic $inc from uploads,
+# deletes and feedback, so the stats endpoint is a single _id lookup:
+#
+#   {_id: user_id, total, categories: {...}, styles: {...}, genders: {...},
+#    colors: {...}, preference_sum, item_ids, seq}
+#
+# item_ids lists the items the document counts, so an item's delta is
+# applied once even when a rebuild that already counted it ran between
+# the item write and its $inc. seq is bumped by every update, so a
+# rebuild (which reads the items and then writes) can tell that a delta
+# landed in between and start over instead of overwriting it.
+#
+# scripts/reconcile_wardrobe_stats.py rebuilds them from the items.
+
+# Fields an item contributes to its owner's stats
+STATS_PROJECTION = {
+    "category": 1,
+    "style": 1,
+    "gender": 1,
+    "dominant_color": 1,
+    "preference_score": 1
+}
+
+BREAKDOWNS = ["categories", "styles", "genders", "colors"]
+
+COUNTED = "item_ids"
+
+
+def field_key(value):
+    """
+    Safe Mongo field name for a breakdown value
+    """
+    if value is None or value == "":
+        return "unknown"
+    return str(value).replace(".", "_").replace("$", "_")
+
+
+def item_keys(item):
+    """
+    Breakdown keys (e.g. "categories.top") an item is counted under
+    """
+    return [
+        "categories." + field_key(item.get("category")),
+        "styles." + field_key(item.get("style")),
+        "genders." + field_key(item.get("gender")),
+        "colors." + color_family(item.get("dominant_color"))
+    ]
+
+
+def stats_delta(items, sign=1):
+    """
+    $inc document adding (sign=1) or removing (sign=-1) items
+    """
+    delta = Counter()
+    for item in items:
+        delta["total"] += sign
+        delta["preference_sum"] += sign * item.get("preference_score", 0)
+        for key in item_keys(item):
+            delta[key] += sign
+    return dict(delta)
+
+
+# -------------------------------------------------
+# Incremental Updates
+# -------------------------------------------------
+
+def item_update(user_id: str, item, sign=1):
+    """
+    $inc adding / removing one item, skipped when the document already
+    counts it (adding) or no longer does (removing)
+    """
+    if sign > 0:
+        return UpdateOne(
+            {"_id": user_id, COUNTED: {"$ne": item["_id"]}},
+            {"$inc": {**stats_delta([item]), "seq": 1}, "$push": {COUNTED: item["_id"]}}
+        )
+    return UpdateOne(
+        {"_id": user_id, COUNTED: item["_id"]},
+        {"$inc": {**stats_delta([item], sign=-1), "seq": 1}, "$pull": {COUNTED: item["_id"]}}
+    )
+
+
+def apply_items(user_id: str, items, sign=1):
+    """
+    Only increments an existing document; a user without one (e.g. items
+    uploaded before stats existed, or a document from before item_ids)
+    gets a full rebuild instead, so the first $inc never starts counting
+    from zero
+    """
+    result = wardrobe_stats_collection.bulk_write(
+        [item_update(user_id, item, sign) for item in items],
+        ordered=False
+    )
+    if result.matched_count < len(items) and not wardrobe_stats_collection.count_documents(
+        {"_id": user_id, COUNTED: {"$exists": True}, "building": {"$exists": False}}, limit=1
+    ):
+        rebuild_stats(user_id)
+
+
+def record_items_added(user_id: str, items):
+    if items:
+        apply_items(user_id, items)
+
+
+def record_item_removed(user_id: str, item):
+    apply_items(user_id, [item], sign=-1)
+
+
+def refresh_preference_sum(user_id: str):
+    """
+    Feedback updates are clamped in the database, so the change in the
+    sum is not known up front; recompute it for this user only
+    """
+    result = list(wardrobe_collection.aggregate([
+        {"$match": {"user_id": user_id}},
+        {"$group": {"_id": None, "sum": {"$sum": "$preference_score"}}}
+    ]))
+    preference_sum = result[0]["sum"] if result else 0
+
+    result = wardrobe_stats_collection.update_one(
+        {"_id": user_id},
+        {"$set": {"preference_sum": preference_sum}, "$inc": {"seq": 1}}
+    )
+    if result.matched_count == 0:
+        rebuild_stats(user_id)
+
+
+# -------------------------------------------------
+# Full Rebuild
+# -------------------------------------------------
+
+def compute_stats(items):
+    stats = {"total": 0, "preference_sum": 0}
+    for name in BREAKDOWNS:
+        stats[name] = {}
+
+    for item in items:
+        stats["total"] += 1
+        stats["preference_sum"] += item.get("preference_score", 0)
+        for key in item_keys(item):
+            name, value = key.split(".", 1)
+            stats[name][value] = stats[name].get(value, 0) + 1
+
+    return stats
+
+
+def rebuild_stats(user_id: str):
+    """
+    Recompute the document from the items. A missing document is first
+    created empty and marked "building", so deltas arriving meanwhile bump
+    its seq; the result is only written if seq is unchanged since before
+    the items were read, otherwise the rebuild runs again.
+    """
+    while True:
+        current = wardrobe_stats_collection.find_one_and_update(
+            {"_id": user_id},
+            {"$setOnInsert": {"building": True}},
+            projection={"seq": 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        seq = current.get("seq")
+
+        items = list(wardrobe_collection.find({"user_id": user_id}, STATS_PROJECTION))
+        stats = compute_stats(items)
+        result = wardrobe_stats_collection.replace_one(
+            {"_id": user_id, "seq": seq},
+            {**stats, COUNTED: [item["_id"] for item in items], "seq": (seq or 0) + 1}
+        )
+        if result.matched_count:
+            return stats
+
+
+# -------------------------------------------------
+# Read
+# -------------------------------------------------
+
+def format_stats(stats):
+    """
+    API shape of a stats document
+    """
+    total = stats.get("total", 0)
+
+    # Removing an item leaves its keys at 0
+    def counts(name):
+        return {key: count for key, count in stats.get(name, {}).items() if count > 0}
+
+    return {
+        "total": total,
+        "categories": counts("categories"),
+        "styles": counts("styles"),
+        "genders": counts("genders"),
+        "colors": counts("colors"),
+        "average_preference": round(stats.get("preference_sum", 0) / total, 2) if total else 0.0
+    }
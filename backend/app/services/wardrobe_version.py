@@ -0,0 +1,16 @@
+from pymongo import ReturnDocument
+
+from app.config.db import wardrobe_versions_collection
+
+# A per-user counter bumped on every change that can alter recommendations
+# (upload, delete, applied feedback). Used to key / invalidate caches.
+
+
+def bump_wardrobe_version(user_id: str) -> int:
+    doc = wardrobe_versions_collection.find_one_and_update(
+        {"_id": user_id},
+        {"$inc": {"version": 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return doc["version"]
@@ -0,0 +1,5 @@
+import os
+
+# Benchmarks never touch MongoDB: request handlers run on the in-memory
+# repositories. Set before anything imports app.repositories.
+os.environ["STORAGE_BACKEND"] = "memory"
@@ -0,0 +1,54 @@
+"""
+Performance benchmarks for the recommendation, upload and auth hot paths.
+
+    python -m benchmarks                         # everything, report in benchmarks/results/
+    python -m benchmarks -k recommend -k rank    # only matching cases
+    python -m benchmarks --sizes 10 100          # smaller wardrobes (quick run)
+    python -m benchmarks --compare benchmarks/results/<commit>.json
+
+Runs offline: synthetic wardrobes and images, a stub rembg session and
+the in-memory storage backend. With --compare the exit code is 1 when a
+benchmark's median got slower than --threshold.
+"""
+import argparse
+import json
+import os
+import sys
+
+from benchmarks import cases  # noqa: F401  (registers the cases)
+from benchmarks.runner import run, build_report, save_report, compare, MAX_TIME, MIN_ROUNDS
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-k", dest="selection", action="append", help="run cases whose name contains this (repeatable)")
+    parser.add_argument("--sizes", type=int, nargs="+", help="items per category (default 10 100 1000 5000)")
+    parser.add_argument("--max-time", type=float, default=MAX_TIME, help="seconds spent per benchmark")
+    parser.add_argument("--min-rounds", type=int, default=MIN_ROUNDS)
+    parser.add_argument("--out", help="report path (default benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", help="earlier report to compare with")
+    parser.add_argument("--threshold", type=float, default=0.1, help="slowdown counted as a regression (0.1 = 10%%)")
+    args = parser.parse_args()
+
+    overrides = {"size": args.sizes} if args.sizes else {}
+    results = run(args.selection, overrides, args.max_time, args.min_rounds)
+
+    report = build_report(results)
+    commit = report["commit_info"]
+    name = (commit["id"] or "unknown")[:12] + ("-dirty" if commit["dirty"] else "")
+    out = args.out or os.path.join(RESULTS_DIR, f"{name}.json")
+    save_report(report, out)
+    print(f"\nReport written to {out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) slower than the threshold")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
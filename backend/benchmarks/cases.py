@@ -0,0 +1,169 @@
+import os
+import tempfile
+
+from benchmarks.runner import case, Skip
+from benchmarks.generators import make_wardrobe, make_outfits, make_cutout, make_photo_bytes
+from benchmarks.fixtures import app_client, use_stub_rembg_session
+
+# Items per category
+SIZES = [10, 100, 1000, 5000]
+
+# The exhaustive engine is O(tops x bottoms) in pure Python (~1.5 s at 300)
+EXHAUSTIVE_MAX_SIZE = 300
+
+CONTEXT = {"occasion": "casual", "weather_type": "sunny"}
+# Jewellery is only picked for party / traditional outfits
+EXTRAS_CONTEXT = {"occasion": "party", "weather_type": "sunny"}
+
+
+# -------------------------------------------------
+# Ranking / Composition
+# -------------------------------------------------
+
+@case("ranking", engine=["exhaustive", "vectorized", "streaming"], size=SIZES)
+def rank_outfits(benchmark, engine, size):
+    from app.services.decision_engine import rank_outfits
+
+    if engine == "exhaustive" and size > EXHAUSTIVE_MAX_SIZE:
+        raise Skip(f"exhaustive above {EXHAUSTIVE_MAX_SIZE} items")
+
+    wardrobe = make_wardrobe(size, categories=["top", "bottom"])
+    benchmark(rank_outfits, wardrobe["top"], wardrobe["bottom"], CONTEXT, mode=engine)
+
+
+@case("ranking", size=SIZES)
+def compose_outfits(benchmark, size):
+    from app.services.composition_engine import compose_outfits
+
+    wardrobe = make_wardrobe(size)
+    benchmark(
+        compose_outfits,
+        wardrobe["top"], wardrobe["bottom"],
+        wardrobe["shoes"], wardrobe["accessories"], wardrobe["jewellery"],
+        CONTEXT
+    )
+
+
+# -------------------------------------------------
+# Accessories
+# -------------------------------------------------
+
+@case("accessories", selector=["shoes", "accessories", "jewellery"], size=SIZES)
+def select_extra(benchmark, selector, size):
+    from app.services.accessories_engine import select_best_shoes, select_accessories, select_jewellery
+
+    wardrobe = make_wardrobe(size)
+    outfit = make_outfits(wardrobe, 1)[0]
+
+    if selector == "shoes":
+        benchmark(select_best_shoes, wardrobe["shoes"], outfit, EXTRAS_CONTEXT)
+    elif selector == "accessories":
+        benchmark(select_accessories, wardrobe["accessories"], outfit, EXTRAS_CONTEXT, limit=1)
+    else:
+        benchmark(select_jewellery, wardrobe["jewellery"], outfit, EXTRAS_CONTEXT)
+
+
+@case("accessories", size=SIZES)
+def select_extras_batch(benchmark, size):
+    from app.services.accessories_engine import select_extras_batch
+
+    wardrobe = make_wardrobe(size)
+    benchmark(
+        select_extras_batch,
+        make_outfits(wardrobe, 3),
+        wardrobe["shoes"], wardrobe["accessories"], wardrobe["jewellery"],
+        EXTRAS_CONTEXT
+    )
+
+
+# -------------------------------------------------
+# Images
+# -------------------------------------------------
+
+@case("images", mode=["kmeans", "fast"], garment=["solid", "stripes", "blocks"])
+def extract_dominant_colors(benchmark, mode, garment):
+    from app.services.color_service import extract_dominant_colors
+
+    fd, path = tempfile.mkstemp(suffix=".png")
+    os.close(fd)
+    try:
+        make_cutout(garment).save(path)
+        benchmark(extract_dominant_colors, path, mode=mode)
+    finally:
+        os.remove(path)
+
+
+@case("images", garment=["solid", "stripes"])
+def process_image(benchmark, garment):
+    from app.services.image_service import process_image_bytes
+
+    use_stub_rembg_session()
+    data = make_photo_bytes(garment)
+
+    def process():
+        os.remove(process_image_bytes(data))
+
+    benchmark(process)
+
+
+# -------------------------------------------------
+# Auth
+# -------------------------------------------------
+
+@case("auth")
+def hash_password(benchmark):
+    from app.services.auth_service import get_password_hash
+
+    benchmark(get_password_hash, "benchmark-password")
+
+
+@case("auth")
+def verify_password(benchmark):
+    from app.services.auth_service import get_password_hash, verify_password
+
+    hashed = get_password_hash("benchmark-password")
+    benchmark(verify_password, "benchmark-password", hashed)
+
+
+@case("auth")
+def current_user(benchmark):
+    """
+    GET /api/auth/me: token check, JWT / user caches
+    """
+    client = app_client()
+    headers = client.login("bench-auth@example.com")
+    benchmark(client.client.get, "/api/auth/me", headers=headers)
+
+
+# -------------------------------------------------
+# API (in-memory storage)
+# -------------------------------------------------
+
+@case("api", cache=["miss", "hit"], size=SIZES)
+def recommend(benchmark, cache, size):
+    """
+    Full POST /api/recommend handler
+    """
+    from app.services.recommendation_cache import recommendation_cache
+
+    client = app_client()
+    headers = client.seed(f"bench-{size}@example.com", make_wardrobe(size))
+
+    def call():
+        response = client.client.post("/api/recommend", data={"occasion": "casual"}, headers=headers)
+        response.raise_for_status()
+
+    if cache == "miss":
+        benchmark.pedantic(call, setup=recommendation_cache.backend.clear)
+    else:
+        benchmark(call)
+
+
+@case("api", size=SIZES)
+def wardrobe_page(benchmark, size):
+    """
+    GET /api/wardrobe, first page of 50
+    """
+    client = app_client()
+    headers = client.seed(f"bench-{size}@example.com", make_wardrobe(size))
+    benchmark(client.client.get, "/api/wardrobe", params={"limit": 50}, headers=headers)
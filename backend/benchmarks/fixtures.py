@@ -0,0 +1,86 @@
+import asyncio
+
+from benchmarks.generators import garment_mask
+
+BENCH_PASSWORD = "benchmark-password"
+
+
+class StubRembgSession:
+    """
+    Stands in for the u2netp session: predict() returns the garment
+    ellipse as the mask instead of running the model, so rembg.remove
+    and the rest of process_image still do their real work
+    """
+
+    def predict(self, img, *args, **kwargs):
+        return [garment_mask(img.size)]
+
+
+def use_stub_rembg_session():
+    from app.services import image_service
+
+    image_service.u2netp_session = StubRembgSession()
+
+
+class AppClient:
+    """
+    TestClient over the app on the in-memory storage backend (see
+    benchmarks/__init__.py), with static weather and no background
+    workers (the lifespan is not started)
+    """
+
+    def __init__(self):
+        from fastapi.testclient import TestClient
+        from app.main import app
+        from app.services.context_service import StaticWeatherProvider, set_weather_provider
+
+        set_weather_provider(StaticWeatherProvider())
+        self.client = TestClient(app)
+        self._users = {}
+
+    def login(self, email):
+        """
+        Authorization headers for email (registered on first use)
+        """
+        if email not in self._users:
+            self.client.post("/api/auth/register", json={
+                "full_name": "Benchmark",
+                "email": email,
+                "password": BENCH_PASSWORD
+            })
+            response = self.client.post("/api/auth/login", data={"username": email, "password": BENCH_PASSWORD})
+            response.raise_for_status()
+            self._users[email] = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        return self._users[email]
+
+    def seed(self, email, wardrobe):
+        """
+        Replace email's wardrobe with a generated one; returns headers
+        """
+        from app.repositories import user_repository, wardrobe_repository
+
+        headers = self.login(email)
+
+        async def insert():
+            user = await user_repository.find_by_email(email)
+            user_id = str(user["_id"])
+            wardrobe_repository.drop_user(user_id)
+            items = [
+                {**{key: value for key, value in item.items() if key != "_id"}, "user_id": user_id}
+                for items in wardrobe.values() for item in items
+            ]
+            await wardrobe_repository.insert_items(items)
+            await wardrobe_repository.bump_version(user_id)
+
+        asyncio.run(insert())
+        return headers
+
+
+_app_client = None
+
+
+def app_client():
+    global _app_client
+    if _app_client is None:
+        _app_client = AppClient()
+    return _app_client
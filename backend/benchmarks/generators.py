@@ -0,0 +1,143 @@
+import io
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from app.services.decision_engine import compute_item_features
+
+# Deterministic synthetic data: the same seed and size always produce the
+# same wardrobe / image, so reports from different commits are comparable
+
+STYLES = ["casual", "formal", "party", "traditional"]
+GENDERS = ["male", "female", "unisex"]
+CATEGORIES = ["top", "bottom", "shoes", "accessories", "jewellery"]
+
+IMAGE_SIZE = 400
+
+# (colors, pattern) of the synthetic garment images
+GARMENTS = {
+    "solid": ([(200, 30, 30)], "solid"),
+    "stripes": ([(20, 40, 120), (230, 230, 230), (200, 180, 40)], "stripes"),
+    "blocks": ([(30, 110, 60), (200, 180, 40), (90, 20, 90)], "blocks")
+}
+
+
+# -------------------------------------------------
+# Wardrobes
+# -------------------------------------------------
+
+def random_color(rng):
+    # A share of neutrals, like real wardrobes
+    if rng.random() < 0.3:
+        grey = rng.randint(0, 255)
+        return [grey, grey, grey]
+    return [rng.randint(0, 255) for _ in range(3)]
+
+
+def make_item(rng, user_id, category, index, now):
+    dominant = random_color(rng)
+    item = {
+        "_id": f"{category}-{index}",
+        "user_id": user_id,
+        "category": category,
+        "style": rng.choice(STYLES),
+        "gender": rng.choice(GENDERS),
+        "image_path": f"https://example.invalid/{category}/{index}.png",
+        "dominant_color": dominant,
+        "colors": [dominant] + [random_color(rng) for _ in range(rng.randint(0, 2))],
+        "preference_score": rng.randint(-5, 5),
+        "usage_count": rng.randint(0, 10)
+    }
+    if rng.random() < 0.3:
+        item["last_used"] = now - timedelta(days=rng.randint(0, 10))
+    if category == "shoes" and rng.random() < 0.3:
+        item["shoe_type"] = "open"
+    item["features"] = compute_item_features(item)
+    return item
+
+
+def make_wardrobe(size, user_id="bench-user", seed=0, categories=CATEGORIES):
+    """
+    category -> size items. Items have string _ids; drop them before
+    inserting into a repository so it assigns ObjectIds.
+    """
+    rng = random.Random(f"{seed}-{size}")
+    now = datetime(2026, 1, 1)
+    return {
+        category: [make_item(rng, user_id, category, i, now) for i in range(size)]
+        for category in categories
+    }
+
+
+def make_outfits(wardrobe, count=3):
+    """
+    The first count top / bottom pairs as outfits (accessory selectors)
+    """
+    return [
+        {"top": top, "bottom": bottom}
+        for top, bottom in zip(wardrobe["top"][:count], wardrobe["bottom"][:count])
+    ]
+
+
+# -------------------------------------------------
+# Images
+# -------------------------------------------------
+
+def garment_pixels(colors, pattern, seed=0):
+    """
+    (IMAGE_SIZE, IMAGE_SIZE, 3) colored pattern with fabric noise
+    """
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[:IMAGE_SIZE, :IMAGE_SIZE]
+
+    if pattern == "stripes":
+        index = (yy // 25) % len(colors)
+    elif pattern == "blocks":
+        index = ((yy // 100) + (xx // 100)) % len(colors)
+    else:
+        index = np.zeros((IMAGE_SIZE, IMAGE_SIZE), dtype=int)
+
+    rgb = np.array(colors)[index].astype(float)
+    rgb += rng.normal(0, 12, size=rgb.shape)
+    return np.clip(rgb, 0, 255).astype(np.uint8)
+
+
+def garment_mask(size=(IMAGE_SIZE, IMAGE_SIZE)):
+    """
+    Ellipse covering the garment (255 inside), soft at the edge
+    """
+    width, height = size
+    mask = Image.new("L", size, 0)
+    ImageDraw.Draw(mask).ellipse(
+        (width * 0.15, height * 0.1, width * 0.85, height * 0.9), fill=255
+    )
+    return mask
+
+
+def make_cutout(name="stripes", seed=0):
+    """
+    Background-removed garment (transparent outside the ellipse), the
+    input of extract_dominant_colors
+    """
+    colors, pattern = GARMENTS[name]
+    image = Image.fromarray(garment_pixels(colors, pattern, seed), "RGB").convert("RGBA")
+    image.putalpha(garment_mask())
+    return image
+
+
+def make_photo_bytes(name="stripes", seed=0, size=1024):
+    """
+    PNG "photo" of a garment on a plain background, the input of
+    process_image_bytes
+    """
+    colors, pattern = GARMENTS[name]
+    garment = Image.fromarray(garment_pixels(colors, pattern, seed), "RGB")
+    photo = Image.new("RGB", (IMAGE_SIZE, IMAGE_SIZE), (235, 235, 230))
+    photo.paste(garment, mask=garment_mask())
+    photo = photo.resize((size, size))
+
+    buffer = io.BytesIO()
+    photo.save(buffer, "PNG")
+    return buffer.getvalue()
@@ -0,0 +1,232 @@
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime
+
+# Per benchmark: keep timing rounds until MAX_TIME seconds have been
+# spent, but always at least MIN_ROUNDS (same defaults as pytest-benchmark)
+MAX_TIME = 1.0
+MIN_ROUNDS = 5
+MAX_ROUNDS = 10000
+
+# Fast calls are repeated within a round until it lasts this long,
+# so timer resolution does not dominate
+MIN_ROUND_TIME = 0.0005
+
+CASES = []
+
+
+class Skip(Exception):
+    """
+    Raised by a case for a parameter combination it does not support
+    """
+
+
+def case(group, **params):
+    """
+    Register a benchmark case. Every keyword is a list of values; the
+    case runs once per combination, e.g.
+
+        @case("ranking", engine=["vectorized", "streaming"], size=SIZES)
+        def rank_outfits(benchmark, engine, size):
+            ...
+            benchmark(fn, *args)
+    """
+    def register(fn):
+        CASES.append((fn, group, params))
+        return fn
+    return register
+
+
+def expand(fn, params, overrides):
+    """
+    (name, kwargs) for every parameter combination of a case
+    """
+    names = list(params)
+    values = [overrides.get(name, params[name]) for name in names]
+    for combination in itertools.product(*values):
+        kwargs = dict(zip(names, combination))
+        label = "-".join(str(value) for value in combination)
+        yield (f"{fn.__name__}[{label}]" if label else fn.__name__), kwargs
+
+
+class BenchmarkFixture:
+    """
+    The `benchmark` argument of a case (pytest-benchmark style):
+    benchmark(fn, *args) times fn; benchmark.pedantic(...) adds a
+    per-round setup and fixed rounds / iterations.
+    """
+
+    def __init__(self, max_time=MAX_TIME, min_rounds=MIN_ROUNDS):
+        self.max_time = max_time
+        self.min_rounds = min_rounds
+        self.stats = None
+
+    def __call__(self, fn, *args, **kwargs):
+        return self.pedantic(fn, args, kwargs)
+
+    def pedantic(self, fn, args=(), kwargs=None, setup=None, rounds=None, iterations=None):
+        kwargs = kwargs or {}
+
+        # Warm-up call (not recorded) doubles as the calibration run
+        if setup:
+            setup()
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        first = max(time.perf_counter() - start, 1e-9)
+
+        if iterations is None:
+            # setup runs once per round, so it can only cover one call
+            iterations = 1 if setup else max(1, int(MIN_ROUND_TIME / first))
+        if rounds is None:
+            rounds = max(self.min_rounds, min(MAX_ROUNDS, int(self.max_time / (first * iterations))))
+
+        times = []
+        for _ in range(rounds):
+            if setup:
+                setup()
+            start = time.perf_counter()
+            for _ in range(iterations):
+                fn(*args, **kwargs)
+            times.append((time.perf_counter() - start) / iterations)
+
+        self.stats = summarize(times, iterations)
+        return result
+
+
+def summarize(times, iterations):
+    q1, _, q3 = statistics.quantiles(times, n=4) if len(times) > 1 else (times[0],) * 3
+    mean = statistics.fmean(times)
+    return {
+        "min": min(times),
+        "max": max(times),
+        "mean": mean,
+        "stddev": statistics.stdev(times) if len(times) > 1 else 0.0,
+        "median": statistics.median(times),
+        "iqr": q3 - q1,
+        "rounds": len(times),
+        "iterations": iterations,
+        "ops": 1 / mean if mean else 0.0
+    }
+
+
+# -------------------------------------------------
+# Running
+# -------------------------------------------------
+
+def run(selection=None, overrides=None, max_time=MAX_TIME, min_rounds=MIN_ROUNDS):
+    """
+    Run every registered case whose name contains one of selection
+    (all when empty). overrides replaces parameter lists, e.g.
+    {"size": [10, 100]}.
+    """
+    results = []
+    for fn, group, params in CASES:
+        for name, kwargs in expand(fn, params, overrides or {}):
+            if selection and not any(part in name for part in selection):
+                continue
+
+            benchmark = BenchmarkFixture(max_time, min_rounds)
+            try:
+                fn(benchmark, **kwargs)
+            except Skip as e:
+                print(f"  {name}: skipped ({e})")
+                continue
+            if benchmark.stats is None:
+                raise RuntimeError(f"{name} never called benchmark()")
+
+            results.append({"name": name, "group": group, "params": kwargs, "stats": benchmark.stats})
+            stats = benchmark.stats
+            print(f"  {name:<48} median {format_time(stats['median']):>10}  "
+                  f"mean {format_time(stats['mean']):>10}  ± {format_time(stats['stddev']):>9}  "
+                  f"({stats['rounds']} x {stats['iterations']})")
+    return results
+
+
+def format_time(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+# -------------------------------------------------
+# Report
+# -------------------------------------------------
+
+def git(*args):
+    try:
+        return subprocess.run(
+            ["git", *args], capture_output=True, text=True, check=True, timeout=10
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def commit_info():
+    return {
+        "id": git("rev-parse", "HEAD"),
+        "branch": git("rev-parse", "--abbrev-ref", "HEAD"),
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))
+    }
+
+
+def machine_info():
+    import numpy as np
+
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__
+    }
+
+
+def build_report(results):
+    return {
+        "datetime": datetime.utcnow().isoformat(),
+        "machine_info": machine_info(),
+        "commit_info": commit_info(),
+        "benchmarks": results
+    }
+
+
+def save_report(report, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+
+
+def compare(previous, current, threshold):
+    """
+    Print the change in median time per benchmark present in both
+    reports; returns the names that got slower by more than threshold
+    (0.1 = 10%)
+    """
+    before = {bench["name"]: bench["stats"] for bench in previous["benchmarks"]}
+    regressions = []
+
+    print(f"\nCompared with {(previous.get('commit_info') or {}).get('id') or 'previous report'}:")
+    for bench in current["benchmarks"]:
+        old = before.get(bench["name"])
+        if not old:
+            continue
+        change = bench["stats"]["median"] / old["median"] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(bench["name"])
+        elif change < -threshold:
+            flag = "  faster"
+        print(f"  {bench['name']:<48} {format_time(old['median']):>10} -> "
+              f"{format_time(bench['stats']['median']):>10}  {change:+7.1%}{flag}")
+
+    return regressions
+
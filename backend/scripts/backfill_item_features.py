@@ -0,0 +1,39 @@
+from pymongo import UpdateOne
+
+from app.config.db import wardrobe_collection
+from app.services.color_space import COLOR_METRIC
+from app.services.decision_engine import FEATURE_VERSION, compute_item_features
+
+BATCH_SIZE = 500
+
+
+def backfill(batch_size=BATCH_SIZE):
+    """
+    Store the current feature block on every wardrobe document that is
+    missing it, was computed by an older FEATURE_VERSION or for another
+    COLOR_METRIC
+    """
+    cursor = wardrobe_collection.find({"$or": [
+        {"features.version": {"$ne": FEATURE_VERSION}},
+        {"features.metric": {"$ne": COLOR_METRIC}}
+    ]})
+
+    ops = []
+    updated = 0
+    for item in cursor:
+        ops.append(UpdateOne(
+            {"_id": item["_id"]},
+            {"$set": {"features": compute_item_features(item)}}
+        ))
+        if len(ops) >= batch_size:
+            updated += wardrobe_collection.bulk_write(ops, ordered=False).modified_count
+            ops = []
+
+    if ops:
+        updated += wardrobe_collection.bulk_write(ops, ordered=False).modified_count
+
+    print('feature version:', FEATURE_VERSION, 'metric:', COLOR_METRIC, 'updated:', updated)
+
+
+if __name__ == '__main__':
+    backfill()
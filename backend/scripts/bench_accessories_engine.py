@@ -0,0 +1,117 @@
+import random
+import sys
+import time
+
+from app.services.accessories_engine import (
+    select_best_shoes,
+    select_accessories,
+    select_jewellery,
+    select_extras_batch
+)
+
+STYLES = ["casual", "formal", "party", "traditional", "office"]
+OCCASIONS = ["casual", "office", "party", "traditional"]
+
+
+def random_item(rng, item_id):
+    item = {
+        "_id": item_id,
+        "style": rng.choice(STYLES),
+        "preference_score": rng.randint(-5, 5)
+    }
+    roll = rng.random()
+    if roll < 0.05:
+        pass
+    elif roll < 0.3:
+        grey = rng.randint(0, 255)
+        item["dominant_color"] = [grey, grey, grey]
+    else:
+        item["dominant_color"] = [rng.randint(0, 255) for _ in range(3)]
+    item["colors"] = [item.get("dominant_color") or [0, 0, 0]]
+    if rng.random() < 0.3:
+        item["shoe_type"] = "open"
+    return item
+
+
+def random_outfit(rng, index):
+    if rng.random() < 0.2:
+        return {"full_body": random_item(rng, f"f{index}")}
+    return {"top": random_item(rng, f"t{index}"), "bottom": random_item(rng, f"b{index}")}
+
+
+def per_outfit(outfits, shoes, accessories, jewellery, context):
+    return [
+        {
+            "shoes": select_best_shoes(shoes, outfit, context),
+            "accessories": select_accessories(accessories, outfit, context, limit=1),
+            "jewellery": select_jewellery(jewellery, outfit, context)
+        }
+        for outfit in outfits
+    ]
+
+
+def summarize(extras):
+    return [
+        (
+            e["shoes"] and e["shoes"]["_id"],
+            [a["_id"] for a in e["accessories"]],
+            e["jewellery"] and e["jewellery"]["_id"]
+        )
+        for e in extras
+    ]
+
+
+def check_parity(rng, rounds=500):
+    for _ in range(rounds):
+        outfits = [random_outfit(rng, i) for i in range(rng.randint(1, 3))]
+        shoes = [random_item(rng, f"s{i}") for i in range(rng.randint(0, 10))]
+        accessories = [random_item(rng, f"a{i}") for i in range(rng.randint(0, 10))]
+        jewellery = [random_item(rng, f"j{i}") for i in range(rng.randint(0, 10))]
+        context = {
+            "occasion": rng.choice(OCCASIONS),
+            "weather_type": rng.choice(["rainy", "sunny"])
+        }
+
+        expected = summarize(per_outfit(outfits, shoes, accessories, jewellery, context))
+        actual = summarize(select_extras_batch(outfits, shoes, accessories, jewellery, context))
+        if expected != actual:
+            print("MISMATCH")
+            print(" expected:", expected)
+            print(" actual:  ", actual)
+            return False
+    return True
+
+
+def benchmark(rng, size):
+    outfits = [random_outfit(rng, i) for i in range(3)]
+    shoes = [random_item(rng, f"s{i}") for i in range(size)]
+    accessories = [random_item(rng, f"a{i}") for i in range(size)]
+    jewellery = [random_item(rng, f"j{i}") for i in range(size)]
+    context = {"occasion": "party", "weather_type": "rainy"}
+
+    start = time.perf_counter()
+    per_outfit(outfits, shoes, accessories, jewellery, context)
+    loop = time.perf_counter() - start
+
+    start = time.perf_counter()
+    select_extras_batch(outfits, shoes, accessories, jewellery, context)
+    batch = time.perf_counter() - start
+
+    print(f"3 outfits x {size} items per category: per-outfit {loop * 1000:.1f} ms, "
+          f"batched {batch * 1000:.1f} ms ({loop / batch:.1f}x)")
+
+
+def main():
+    rng = random.Random(7)
+
+    print("Checking parity with the per-outfit selectors...")
+    if not check_parity(rng):
+        sys.exit(1)
+    print("Parity OK")
+
+    for size in (10, 100, 1000):
+        benchmark(rng, size)
+
+
+if __name__ == '__main__':
+    main()
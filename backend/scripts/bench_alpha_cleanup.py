@@ -0,0 +1,79 @@
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+from app.services.image_service import clean_alpha
+
+SIZE = (400, 400)
+
+
+def legacy_clean_alpha(image, threshold=100):
+    """
+    The original per-pixel loop from process_image
+    """
+    pixels = image.getdata()
+    new_pixels = []
+
+    for item in pixels:
+        if item[3] < threshold:  # low alpha → make fully transparent
+            new_pixels.append((0, 0, 0, 0))
+        else:
+            new_pixels.append(item)
+
+    image.putdata(new_pixels)
+    return image
+
+
+def fixture(seed):
+    """
+    Random colors with a soft circular cut-out, like rembg output
+    """
+    rng = np.random.default_rng(seed)
+    rgb = rng.integers(0, 256, size=(SIZE[1], SIZE[0], 3), dtype=np.uint8)
+
+    yy, xx = np.mgrid[:SIZE[1], :SIZE[0]]
+    dist = np.hypot(xx - SIZE[0] / 2, yy - SIZE[1] / 2)
+    alpha = np.clip((170 - dist) * 8 + rng.integers(-40, 40, size=dist.shape), 0, 255).astype(np.uint8)
+
+    return Image.fromarray(np.dstack([rgb, alpha]), "RGBA")
+
+
+def timed(fn, image, rounds=5):
+    best = float("inf")
+    for _ in range(rounds):
+        copy = image.copy()
+        start = time.perf_counter()
+        fn(copy)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    ok = True
+    for seed in range(5):
+        image = fixture(seed)
+        for threshold in (1, 100, 255):
+            expected = legacy_clean_alpha(image.copy(), threshold)
+            actual = clean_alpha(image.copy(), threshold=threshold, feather_radius=0)
+            if expected.tobytes() != actual.tobytes():
+                print('MISMATCH seed', seed, 'threshold', threshold)
+                ok = False
+
+    if not ok:
+        sys.exit(1)
+    print('Pixel-exact with the legacy loop')
+
+    image = fixture(0)
+    legacy = timed(legacy_clean_alpha, image)
+    fast = timed(lambda img: clean_alpha(img, feather_radius=0), image)
+    feathered = timed(lambda img: clean_alpha(img, feather_radius=1.5), image)
+
+    print(f"legacy loop:      {legacy * 1000:.2f} ms")
+    print(f"clean_alpha:      {fast * 1000:.2f} ms ({legacy / fast:.0f}x)")
+    print(f"  with feathering: {feathered * 1000:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+import os
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+from app.services.color_service import extract_dominant_colors
+
+SIZE = 400
+
+# (colors, pattern) for each synthetic garment
+FIXTURES = [
+    ([(200, 30, 30)], "solid"),
+    ([(20, 40, 120), (230, 230, 230)], "stripes"),
+    ([(30, 110, 60), (200, 180, 40), (90, 20, 90)], "blocks"),
+    ([(240, 200, 180), (60, 60, 60)], "stripes"),
+    ([(10, 10, 10), (250, 120, 0), (0, 160, 200)], "stripes"),
+    ([(150, 100, 60), (170, 120, 80)], "blocks"),
+]
+
+
+def make_fixture(path, colors, pattern, seed):
+    """
+    Garment-like cut-out: colored pattern with fabric noise inside an
+    ellipse, fully transparent background
+    """
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[:SIZE, :SIZE]
+
+    if pattern == "stripes":
+        index = (yy // 25) % len(colors)
+    elif pattern == "blocks":
+        index = ((yy // 100) + (xx // 100)) % len(colors)
+    else:
+        index = np.zeros((SIZE, SIZE), dtype=int)
+
+    rgb = np.array(colors)[index].astype(float)
+    rgb += rng.normal(0, 12, size=rgb.shape)
+    rgb = np.clip(rgb, 0, 255).astype(np.uint8)
+
+    inside = ((xx - SIZE / 2) / 170) ** 2 + ((yy - SIZE / 2) / 190) ** 2 < 1
+    alpha = np.where(inside, 255, 0).astype(np.uint8)
+
+    Image.fromarray(np.dstack([rgb, alpha]), "RGBA").save(path)
+
+
+def palette_distance(reference, candidate):
+    """
+    Mean distance (RGB units) from each reference color to its closest candidate color
+    """
+    ref = np.array(reference, dtype=float)
+    cand = np.array(candidate, dtype=float)
+    dists = np.linalg.norm(ref[:, None, :] - cand[None, :, :], axis=2)
+    return dists.min(axis=1).mean()
+
+
+def timed(path, mode):
+    start = time.perf_counter()
+    colors = extract_dominant_colors(path, mode=mode)
+    return colors, time.perf_counter() - start
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        totals = {"kmeans": 0.0, "fast": 0.0}
+
+        print(f"{'fixture':<10}{'kmeans ms':>10}{'fast ms':>10}{'palette Δ':>11}{'dominant Δ':>12}  deterministic")
+        for i, (colors, pattern) in enumerate(FIXTURES):
+            path = os.path.join(tmp, f"fixture_{i}.png")
+            make_fixture(path, colors, pattern, seed=i)
+
+            reference, kmeans_time = timed(path, "kmeans")
+            fast, fast_time = timed(path, "fast")
+            repeat, _ = timed(path, "fast")
+
+            totals["kmeans"] += kmeans_time
+            totals["fast"] += fast_time
+
+            dominant = np.linalg.norm(np.subtract(reference[0], fast[0]))
+            print(f"{pattern + str(i):<10}{kmeans_time * 1000:>10.1f}{fast_time * 1000:>10.1f}"
+                  f"{palette_distance(reference, fast):>11.1f}{dominant:>12.1f}  {fast == repeat}")
+
+        print(f"total: kmeans {totals['kmeans'] * 1000:.0f} ms, fast {totals['fast'] * 1000:.0f} ms "
+              f"({totals['kmeans'] / totals['fast']:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+import random
+import time
+
+from app.services.decision_engine import rank_outfits
+from app.services.accessories_engine import select_extras_batch
+from app.services.composition_engine import compose_outfits
+
+STYLES = ["casual", "formal", "party", "traditional", "office"]
+
+
+def random_item(rng, item_id):
+    rgb = [rng.randint(0, 255) for _ in range(3)]
+    item = {
+        "_id": item_id,
+        "style": rng.choice(STYLES),
+        "preference_score": rng.randint(-5, 5),
+        "dominant_color": rgb,
+        "colors": [rgb]
+    }
+    if rng.random() < 0.3:
+        item["shoe_type"] = "open"
+    return item
+
+
+def wardrobe(rng, size):
+    return {
+        category: [random_item(rng, f"{category[0]}{i}") for i in range(size)]
+        for category in ("top", "bottom", "shoes", "accessories", "jewellery")
+    }
+
+
+def greedy(items, context):
+    outfits = rank_outfits(items["top"], items["bottom"], context)
+    extras = select_extras_batch(
+        outfits, items["shoes"], items["accessories"], items["jewellery"], context
+    )
+    return outfits, extras
+
+
+def joint(items, context):
+    return compose_outfits(
+        items["top"], items["bottom"], items["shoes"],
+        items["accessories"], items["jewellery"], context
+    )
+
+
+def main():
+    rng = random.Random(11)
+    context = {"occasion": "party", "weather_type": "rainy"}
+
+    for size in (10, 50, 200, 500):
+        items = wardrobe(rng, size)
+
+        start = time.perf_counter()
+        outfits, _ = greedy(items, context)
+        greedy_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        composed = joint(items, context)
+        joint_ms = (time.perf_counter() - start) * 1000
+
+        greedy_tops = len({o["top"]["_id"] for o in outfits})
+        joint_tops = len({o["top"]["_id"] for o in composed})
+        print(f"{size:>4} items per category: greedy {greedy_ms:6.1f} ms "
+              f"({greedy_tops} distinct tops), joint {joint_ms:6.1f} ms "
+              f"({joint_tops} distinct tops, scores {[o['score'] for o in composed]})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from app.services.decision_engine import (
+    generate_ranked_outfits,
+    generate_ranked_outfits_vectorized,
+    generate_ranked_outfits_streaming
+)
+
+ENGINES = {
+    "vectorized": generate_ranked_outfits_vectorized,
+    "streaming": generate_ranked_outfits_streaming
+}
+
+STYLES = ["casual", "formal", "party", "traditional"]
+
+
+def random_item(rng, item_id):
+    item = {
+        "_id": item_id,
+        "style": rng.choice(STYLES),
+        "dominant_color": [rng.randint(0, 255) for _ in range(3)],
+        "colors": [[rng.randint(0, 255) for _ in range(3)] for _ in range(rng.randint(1, 3))],
+        "preference_score": rng.randint(-5, 5),
+        "usage_count": rng.randint(0, 10)
+    }
+    if rng.random() < 0.3:
+        grey = rng.randint(0, 255)
+        item["dominant_color"] = [grey, grey, grey]
+    if rng.random() < 0.3:
+        item["last_used"] = datetime.utcnow() - timedelta(days=rng.randint(0, 5))
+    return item
+
+
+def summarize(outfits):
+    return [(o["top"]["_id"], o["bottom"]["_id"], o["score"]) for o in outfits]
+
+
+def check_parity(rng, rounds=200):
+    for _ in range(rounds):
+        tops = [random_item(rng, f"t{i}") for i in range(rng.randint(1, 30))]
+        bottoms = [random_item(rng, f"b{i}") for i in range(rng.randint(1, 30))]
+        context = {
+            "occasion": rng.choice(["casual", "office", "party", "traditional"]),
+            "weather_type": rng.choice(["rainy", "sunny", "cloudy"])
+        }
+        for limit in (1, 3, 10):
+            expected = summarize(generate_ranked_outfits(tops, bottoms, context, limit))
+            for name, engine in ENGINES.items():
+                actual = summarize(engine(tops, bottoms, context, limit))
+                if expected != actual:
+                    print("MISMATCH", name)
+                    print(" expected:", expected)
+                    print(" actual:  ", actual)
+                    return False
+    return True
+
+
+def benchmark(rng, size):
+    tops = [random_item(rng, f"t{i}") for i in range(size)]
+    bottoms = [random_item(rng, f"b{i}") for i in range(size)]
+    context = {"occasion": "casual", "weather_type": "sunny"}
+
+    start = time.perf_counter()
+    generate_ranked_outfits(tops, bottoms, context)
+    exhaustive = time.perf_counter() - start
+
+    timings = []
+    for name, engine in ENGINES.items():
+        start = time.perf_counter()
+        engine(tops, bottoms, context)
+        elapsed = time.perf_counter() - start
+        timings.append(f"{name} {elapsed * 1000:.1f} ms ({exhaustive / elapsed:.0f}x)")
+
+    print(f"{size} x {size}: exhaustive {exhaustive * 1000:.1f} ms, " + ", ".join(timings))
+
+
+def main():
+    rng = random.Random(42)
+
+    print("Checking parity of the fast engines with generate_ranked_outfits...")
+    if not check_parity(rng):
+        sys.exit(1)
+    print("Parity OK")
+
+    for size in (10, 100, 300):
+        benchmark(rng, size)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+import sys
+import time
+
+import numpy as np
+
+from app.services.color_space import (
+    HARMONY_LUT_PATH,
+    LUT_BINS,
+    save_harmony_lut,
+    harmony_matrix,
+    pack_colors,
+    color_features
+)
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else HARMONY_LUT_PATH
+
+    start = time.perf_counter()
+    save_harmony_lut(path)
+    print(f"Built {LUT_BINS} x {LUT_BINS} table in {time.perf_counter() - start:.2f}s -> {path}")
+
+    start = time.perf_counter()
+    lut = np.load(path, mmap_mode="r")
+    print(f"Memory-mapped in {(time.perf_counter() - start) * 1000:.2f} ms")
+
+    # Table lookups vs exact Delta E on a 300 x 300 wardrobe
+    rng = np.random.default_rng(0)
+    colors = pack_colors([color_features(list(map(int, c))) for c in rng.integers(0, 256, (300, 3))])
+
+    for metric in ("lab", "lut"):
+        start = time.perf_counter()
+        scores = harmony_matrix(colors, colors, metric)
+        print(f"{metric}: {(time.perf_counter() - start) * 1000:.2f} ms")
+
+    # Quantization error of the 16-level bins
+    error = np.abs(scores - harmony_matrix(colors, colors, "lab"))
+    print(f"Lookup error vs exact: mean {error.mean():.3f}, max {error.max():.3f}, shape {lut.shape}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+"""
+Concurrent load test for POST /api/recommend against a running server.
+
+    # terminal 1 (local mongod, recommendation cache off so every request
+    # runs the full path)
+    RECOMMEND_CACHE_TTL=0 MONGO_URI=mongodb://localhost:27017 uvicorn app.main:app --port 10000
+
+    # terminal 2
+    MONGO_URI=mongodb://localhost:27017 python -m scripts.load_test_recommend --seed 200
+
+Run it against the previous (sync) revision with the same arguments to
+compare throughput. Needs httpx (pip install httpx).
+
+Offline, without a server or MongoDB (app served in-process on the
+in-memory storage backend):
+
+    RECOMMEND_CACHE_TTL=0 python -m scripts.load_test_recommend --in-process --seed 200
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import time
+
+import httpx
+
+OCCASIONS = ["casual", "office", "party"]
+STYLES = ["casual", "formal", "party"]
+
+
+def build_items(user_id, per_category):
+    """
+    Synthetic items (no image processing)
+    """
+    from app.services.decision_engine import compute_item_features
+
+    rng = random.Random(0)
+    docs = []
+    for category in ["top", "bottom", "shoes", "accessories"]:
+        for i in range(per_category):
+            rgb = [rng.randint(0, 255) for _ in range(3)]
+            doc = {
+                "user_id": user_id,
+                "category": category,
+                "style": STYLES[i % len(STYLES)],
+                "gender": "male",
+                "image_path": f"https://example.invalid/{category}/{i}.png",
+                "dominant_color": rgb,
+                "colors": [rgb],
+                "preference_score": rng.randint(-5, 5),
+                "usage_count": 0,
+                "last_used": None
+            }
+            doc["features"] = compute_item_features(doc)
+            docs.append(doc)
+    return docs
+
+
+def seed_wardrobe(user_id, per_category):
+    """
+    Replace the user's wardrobe directly in the database
+    """
+    from app.config.db import wardrobe_collection
+    from app.services.wardrobe_version import bump_wardrobe_version
+    from app.services.wardrobe_stats import rebuild_stats
+
+    wardrobe_collection.delete_many({"user_id": user_id})
+    wardrobe_collection.insert_many(build_items(user_id, per_category))
+    bump_wardrobe_version(user_id)
+    rebuild_stats(user_id)
+
+
+async def seed_repository(email, per_category):
+    """
+    Same, through the repositories (in-process runs)
+    """
+    from app.repositories import user_repository, wardrobe_repository
+
+    user_id = str((await user_repository.find_by_email(email))["_id"])
+    await wardrobe_repository.insert_items(build_items(user_id, per_category))
+    await wardrobe_repository.bump_version(user_id)
+
+
+async def login(client, email, password):
+    await client.post("/api/auth/register", json={
+        "full_name": "Load Test",
+        "email": email,
+        "password": password
+    })
+    response = await client.post("/api/auth/login", data={"username": email, "password": password})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def run_level(client, token, concurrency, total):
+    latencies = []
+    errors = 0
+    sent = 0
+
+    async def worker():
+        nonlocal errors, sent
+        while sent < total:
+            sent += 1
+            start = time.perf_counter()
+            try:
+                response = await client.post(
+                    "/api/recommend",
+                    data={"occasion": random.choice(OCCASIONS), "gender": "male"},
+                    headers={"Authorization": f"Bearer {token}"}
+                )
+                if response.status_code != 200 or "error" in response.json():
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0
+    print(f"concurrency {concurrency:>4}: {len(latencies) / elapsed:8.1f} req/s, "
+          f"p50 {statistics.median(latencies) * 1000:7.1f} ms, p95 {p95 * 1000:7.1f} ms, "
+          f"errors {errors}")
+
+
+async def main(args):
+    options = {
+        "base_url": args.base_url,
+        "limits": httpx.Limits(max_connections=max(args.concurrency)),
+        "timeout": 60
+    }
+    if args.in_process:
+        os.environ["STORAGE_BACKEND"] = "memory"
+        from app.main import app
+        options["transport"] = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(**options) as client:
+        token = await login(client, args.email, args.password)
+
+        if args.seed and args.in_process:
+            await seed_repository(args.email, args.seed)
+        elif args.seed:
+            from app.services.auth_service import get_user_by_email_async
+            user = await get_user_by_email_async(args.email)
+            seed_wardrobe(str(user["_id"]), args.seed)
+
+        # Warm up caches / connection pools
+        await run_level(client, token, 1, 5)
+
+        for concurrency in args.concurrency:
+            await run_level(client, token, concurrency, args.requests)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", default="http://localhost:10000")
+    parser.add_argument("--in-process", action="store_true", help="serve the app in-process on the in-memory backend")
+    parser.add_argument("--email", default="loadtest@example.com")
+    parser.add_argument("--password", default="loadtest-password")
+    parser.add_argument("--seed", type=int, default=0, help="items per category to (re)create")
+    parser.add_argument("--requests", type=int, default=300, help="requests per concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 64, 128])
+    main_args = parser.parse_args()
+    asyncio.run(main(main_args))
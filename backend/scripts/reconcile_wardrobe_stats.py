@@ -0,0 +1,41 @@
+import sys
+
+from app.config.db import wardrobe_collection, wardrobe_stats_collection
+from app.services.wardrobe_stats import BREAKDOWNS, COUNTED, rebuild_stats
+
+
+def comparable(stats):
+    """
+    Deletes leave breakdown keys at 0; those are not drift. Only the
+    counts are compared (not the bookkeeping fields).
+    """
+    if stats is None:
+        return None
+    stats = {key: value for key, value in stats.items() if key not in ("_id", COUNTED, "seq", "building")}
+    for name in BREAKDOWNS:
+        stats[name] = {key: count for key, count in stats.get(name, {}).items() if count}
+    return stats
+
+
+def reconcile(user_id=None):
+    """
+    Rebuild the stats document of every user (or one user) from their
+    wardrobe items, and drop documents of users with no items left
+    """
+    user_ids = [user_id] if user_id else wardrobe_collection.distinct("user_id")
+
+    drifted = 0
+    for uid in user_ids:
+        before = comparable(wardrobe_stats_collection.find_one({"_id": uid}))
+        if before != comparable(rebuild_stats(uid)):
+            drifted += 1
+
+    removed = 0
+    if not user_id:
+        removed = wardrobe_stats_collection.delete_many({"_id": {"$nin": user_ids}}).deleted_count
+
+    print('users:', len(user_ids), 'corrected:', drifted, 'removed:', removed)
+
+
+if __name__ == '__main__':
+    reconcile(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -0,0 +1,17 @@
+from app.services.feedback_service import replay_feedback
+
+
+def main(user_id=None):
+    """
+    Rebuild wardrobe preference / usage / recency from the feedback_events log
+    """
+    users = replay_feedback(user_id)
+    print('replayed feedback for', len(users), 'user(s)')
+
+
+if __name__ == '__main__':
+    import sys
+    if len(sys.argv) > 2:
+        print('Usage: replay_feedback_events.py [user_id]')
+    else:
+        main(sys.argv[1] if len(sys.argv) > 1 else None)
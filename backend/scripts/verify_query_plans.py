@@ -0,0 +1,65 @@
+import sys
+
+from bson.objectid import ObjectId
+
+from app.config.db import wardrobe_collection, users_collection, token_blocklist_collection
+from app.config.indexes import ensure_indexes
+from app.routes.recommend import build_wardrobe_query
+
+# Run against a local mongod: MONGO_URI=mongodb://localhost:27017 python -m scripts.verify_query_plans
+USER_ID = str(ObjectId())
+
+
+def hot_queries():
+    """
+    The queries issued on every authenticated / recommend / wardrobe request
+    """
+    queries = [
+        ("get_current_user: user by email", users_collection, {"email": "someone@example.com"}),
+        ("get_current_user: blocklist", token_blocklist_collection, {"token": "some.jwt.token"}),
+        ("wardrobe listing", wardrobe_collection, {"user_id": USER_ID}),
+        ("wardrobe by category", wardrobe_collection, {"user_id": USER_ID, "category": "top"}),
+        ("feedback / delete by id", wardrobe_collection, {"_id": ObjectId(), "user_id": USER_ID})
+    ]
+    for occasion, gender in [("casual", "male"), ("office", "female"), ("traditional", "female")]:
+        queries.append((
+            f"recommend {occasion}/{gender}",
+            wardrobe_collection,
+            build_wardrobe_query(USER_ID, occasion, gender)
+        ))
+    return queries
+
+
+def plan_stages(plan):
+    """
+    All stage names in a winning plan tree
+    """
+    stages = [plan.get("stage")]
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            stages += plan_stages(plan[key])
+    for child in plan.get("inputStages", []):
+        stages += plan_stages(child)
+    return stages
+
+
+def main():
+    ensure_indexes()
+
+    failed = False
+    for name, collection, query in hot_queries():
+        explain = collection.find(query).explain()
+        stages = plan_stages(explain["queryPlanner"]["winningPlan"])
+
+        uses_index = any(stage in ("IXSCAN", "IDHACK", "EXPRESS_IXSCAN", "EXPRESS_IDHACK") for stage in stages)
+        ok = uses_index and "COLLSCAN" not in stages
+        failed = failed or not ok
+
+        print('OK  ' if ok else 'FAIL', name, '->', ' > '.join(s for s in stages if s))
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -34,10 +34,35 @@ export const uploadItem = async (file, category, style = 'casual', gender = 'mal
     const response = await apiClient.post(`/upload`, formData, {
       headers: { 'Content-Type': 'multipart/form-data' },
     });
-    return response.data;
+    if (response.data.error) {
+      return response.data;
+    }
+
+    // Processing happens in the background; wait for the job to finish
+    return await waitForUpload(response.data.job_id);
   } catch (error) {
-    throw error.response?.data || { error: 'Upload failed' };
+    throw error.response?.data || error || { error: 'Upload failed' };
+  }
+};
+
+export const getUploadStatus = async (jobId) => {
+  const response = await apiClient.get(`/upload/${jobId}`);
+  return response.data;
+};
+
+const waitForUpload = async (jobId, intervalMs = 1000, timeoutMs = 120000) => {
+  const deadline = Date.now() + timeoutMs;
+  while (Date.now() < deadline) {
+    const job = await getUploadStatus(jobId);
+    if (job.status === 'done') {
+      return { message: 'Upload successful', ...job.result };
+    }
+    if (job.status === 'failed') {
+      throw { error: job.error || 'Upload failed' };
+    }
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
   }
+  throw { error: 'Upload is taking longer than expected, check your wardrobe shortly' };
 };
 
 export const getRecommendations = async (occasion, gender = 'male') => {
@@ -53,6 +78,16 @@ export const getRecommendations = async (occasion, gender = 'male') => {
   }
 };
 
+// slots: [{ date: 'YYYY-MM-DD', occasion }]
+export const getPlan = async (slots, gender = 'male') => {
+  try {
+    const response = await apiClient.post('/plan', { slots, gender });
+    return response.data;
+  } catch (error) {
+    throw error.response?.data || { error: 'Failed to plan outfits' };
+  }
+};
+
 export const sendFeedback = async (feedbackData) => {
   try {
     const response = await apiClient.post('/feedback', feedbackData);